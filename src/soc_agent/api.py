@@ -2,19 +2,26 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import event as sa_event
 from sqlalchemy.orm import Session
 
 from .database import (
     Alert,
+    SessionLocal,
+    count_alerts,
     get_alerts,
     get_alert_by_id,
+    get_alert_summaries,
     get_alert_statistics,
+    get_alert_timeseries,
     get_db,
     get_top_event_types,
     get_top_ips,
@@ -24,8 +31,44 @@ from .database import (
 
 logger = logging.getLogger(__name__)
 
+
+def _run_with_session(fn, *args):
+    """Run a database helper on its own session (for thread fan-out)."""
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+def _recent_alert_summaries(db: Session, limit: int = 10) -> List[Dict[str, Any]]:
+    """Latest alerts without the JSON blob columns, for the dashboard."""
+    return [
+        alert.to_summary_dict()
+        for alert in get_alerts(db, skip=0, limit=limit, defer_json=True)
+    ]
+
 # Create API router
-api_router = APIRouter(prefix="/api/v1", tags=["alerts"])
+api_router = APIRouter(
+    prefix="/api/v1", tags=["alerts"], default_response_class=ORJSONResponse
+)
+
+# TTL cache for /filters: the four SELECT DISTINCT probes are a per-page-load
+# DB tax, and the option lists change only when alerts are inserted.
+_FILTER_CACHE_TTL = 30.0  # seconds
+_filter_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+
+
+def invalidate_filter_cache() -> None:
+    """Drop the cached filter options (new alerts may add new values)."""
+    global _filter_cache
+    _filter_cache = None
+
+
+@sa_event.listens_for(Alert, "after_insert")
+def _invalidate_filter_cache(mapper, connection, target) -> None:
+    """Drop the cached filter options when a new alert lands."""
+    invalidate_filter_cache()
 
 
 @api_router.get("/alerts", response_model=Dict[str, Any])
@@ -37,38 +80,78 @@ async def get_alerts_endpoint(
     source: Optional[str] = Query(None, description="Filter by source"),
     category: Optional[str] = Query(None, description="Filter by category"),
     search: Optional[str] = Query(None, description="Search in message, IP, username, or event type"),
+    include_details: bool = Query(False, description="Include IOC/intel/raw JSON columns"),
+    before_ts: Optional[datetime] = Query(None, description="Keyset cursor: timestamp of the last seen alert"),
+    before_id: Optional[int] = Query(None, description="Keyset cursor: id of the last seen alert"),
     db: Session = Depends(get_db)
 ):
     """Get alerts with filtering and pagination."""
     try:
-        alerts = get_alerts(
+        # Fetch one extra row to derive has_more without a COUNT(*) over the
+        # whole table; exact totals come from /alerts/count. The default
+        # projection skips the JSON blob columns the list view never renders.
+        # Passing both before_ts and before_id pages by keyset cursor, which
+        # stays O(limit) at any depth; skip/limit remains for compatibility.
+        fetch = get_alerts if include_details else get_alert_summaries
+        rows = fetch(
             db=db,
             skip=skip,
-            limit=limit,
+            limit=limit + 1,
             status=status,
             severity=severity,
             source=source,
             category=category,
-            search=search
+            search=search,
+            before_ts=before_ts,
+            before_id=before_id
         )
-        
-        # Get total count for pagination
-        total_count = db.query(Alert).count()
-        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        pagination: Dict[str, Any] = {
+            "skip": skip,
+            "limit": limit,
+            "has_more": has_more
+        }
+        if has_more and rows:
+            tail = rows[-1]
+            pagination["next_before_ts"] = tail.timestamp if include_details else tail["timestamp"]
+            pagination["next_before_id"] = tail.id if include_details else tail["id"]
+
         return {
-            "alerts": [alert.to_dict() for alert in alerts],
-            "pagination": {
-                "skip": skip,
-                "limit": limit,
-                "total": total_count,
-                "has_more": skip + limit < total_count
-            }
+            "alerts": [row.to_dict() if include_details else row for row in rows],
+            "pagination": pagination
         }
     except Exception as e:
         logger.error(f"Error fetching alerts: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch alerts")
 
 
+@api_router.get("/alerts/count", response_model=Dict[str, Any])
+async def count_alerts_endpoint(
+    status: Optional[str] = Query(None, description="Filter by status"),
+    severity: Optional[int] = Query(None, ge=0, le=10, description="Filter by severity"),
+    source: Optional[str] = Query(None, description="Filter by source"),
+    category: Optional[str] = Query(None, description="Filter by category"),
+    search: Optional[str] = Query(None, description="Search in message, IP, username, or event type"),
+    db: Session = Depends(get_db)
+):
+    """Count alerts matching the listing filters."""
+    try:
+        total = count_alerts(
+            db=db,
+            status=status,
+            severity=severity,
+            source=source,
+            category=category,
+            search=search
+        )
+        return {"total": total}
+    except Exception as e:
+        logger.error(f"Error counting alerts: {e}")
+        raise HTTPException(status_code=500, detail="Failed to count alerts")
+
+
 @api_router.get("/alerts/{alert_id}", response_model=Dict[str, Any])
 async def get_alert_endpoint(
     alert_id: int,
@@ -136,6 +219,20 @@ async def get_statistics_endpoint(
         raise HTTPException(status_code=500, detail="Failed to fetch statistics")
 
 
+@api_router.get("/statistics/timeseries")
+async def get_timeseries_endpoint(
+    days: int = Query(30, ge=1, le=365, description="Number of days to include"),
+    db: Session = Depends(get_db)
+):
+    """Get per-day alert counts."""
+    try:
+        timeseries = get_alert_timeseries(db, days)
+        return {"timeseries": timeseries}
+    except Exception as e:
+        logger.error(f"Error fetching timeseries: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch timeseries")
+
+
 @api_router.get("/statistics/sources")
 async def get_top_sources_endpoint(
     limit: int = Query(10, ge=1, le=100, description="Number of top sources to return"),
@@ -181,31 +278,26 @@ async def get_top_ips_endpoint(
 @api_router.get("/dashboard", response_model=Dict[str, Any])
 async def get_dashboard_data_endpoint(
     days: int = Query(7, ge=1, le=365, description="Number of days to include"),
-    db: Session = Depends(get_db)
 ):
     """Get comprehensive dashboard data."""
     try:
-        # Get statistics
-        stats = get_alert_statistics(db, days)
-        
-        # Get top sources
-        sources = get_top_sources(db, 10)
-        
-        # Get top event types
-        event_types = get_top_event_types(db, 10)
-        
-        # Get top IPs
-        ips = get_top_ips(db, 10)
-        
-        # Get recent alerts (last 24 hours)
-        recent_alerts = get_alerts(db, skip=0, limit=10)
-        
+        # Run the five dashboard queries concurrently, each on its own
+        # session, so the endpoint waits for the slowest query instead of
+        # the sum of all of them.
+        stats, sources, event_types, ips, recent_alerts = await asyncio.gather(
+            asyncio.to_thread(_run_with_session, get_alert_statistics, days),
+            asyncio.to_thread(_run_with_session, get_top_sources, 10),
+            asyncio.to_thread(_run_with_session, get_top_event_types, 10),
+            asyncio.to_thread(_run_with_session, get_top_ips, 10),
+            asyncio.to_thread(_run_with_session, _recent_alert_summaries),
+        )
+
         return {
             "statistics": stats,
             "top_sources": sources,
             "top_event_types": event_types,
             "top_ips": ips,
-            "recent_alerts": [alert.to_dict() for alert in recent_alerts],
+            "recent_alerts": recent_alerts,
             "generated_at": datetime.utcnow().isoformat()
         }
     except Exception as e:
@@ -222,20 +314,27 @@ async def health_check_endpoint():
 @api_router.get("/filters")
 async def get_available_filters_endpoint(db: Session = Depends(get_db)):
     """Get available filter options."""
+    global _filter_cache
+    cached = _filter_cache
+    if cached is not None and time.time() - cached[0] < _FILTER_CACHE_TTL:
+        return cached[1]
+
     try:
         # Get unique values for filters
         sources = db.query(Alert.source).filter(Alert.source.isnot(None)).distinct().all()
         event_types = db.query(Alert.event_type).filter(Alert.event_type.isnot(None)).distinct().all()
         categories = db.query(Alert.category).filter(Alert.category.isnot(None)).distinct().all()
         statuses = db.query(Alert.status).distinct().all()
-        
-        return {
+
+        options = {
             "sources": [row[0] for row in sources],
             "event_types": [row[0] for row in event_types],
             "categories": [row[0] for row in categories],
             "statuses": [row[0] for row in statuses],
             "severity_levels": list(range(0, 11))
         }
+        _filter_cache = (time.time(), options)
+        return options
     except Exception as e:
         logger.error(f"Error fetching filter options: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch filter options")
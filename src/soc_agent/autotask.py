@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Optional, Tuple
+import threading
+from typing import Any, Dict, Optional, Tuple
 
+import orjson
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -11,6 +13,69 @@ from .config import SETTINGS
 
 logger = logging.getLogger(__name__)
 
+# Shared session so bursts of tickets reuse the TCP+TLS connection to Autotask
+# instead of rebuilding a Session, Retry, and adapters per call.
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# Hot config bound once at import; refresh_config() rebinds after SETTINGS
+# changes and drops the session so the retry policy is rebuilt lazily.
+_HTTP_TIMEOUT = SETTINGS.http_timeout
+
+
+# Immutable request parts (URL, auth headers, payload constants) built once
+# after the config check passes; only the title/description/priority vary
+# per ticket.
+_at_static: Optional[Dict[str, Any]] = None
+
+
+def _get_at_static() -> Dict[str, Any]:
+    """Return the cached URL, headers, and fixed payload fields."""
+    global _at_static
+    if _at_static is None:
+        _at_static = {
+            "url": f"{SETTINGS.at_base_url.rstrip('/')}/tickets",
+            "headers": {
+                "ApiIntegrationCode": SETTINGS.at_api_integration_code,
+                "UserName": SETTINGS.at_username,
+                "Secret": SETTINGS.at_secret,
+                "Content-Type": "application/json",
+            },
+            "queue_id": int(SETTINGS.at_queue_id),
+            "account_id": int(SETTINGS.at_account_id),
+            "default_priority": int(SETTINGS.at_ticket_priority),
+        }
+    return _at_static
+
+
+def refresh_config() -> None:
+    """Rebind module-level config constants after SETTINGS changes."""
+    global _HTTP_TIMEOUT, _session, _at_static
+    _HTTP_TIMEOUT = SETTINGS.http_timeout
+    _at_static = None
+    with _session_lock:
+        _session = None
+
+
+def _get_session() -> requests.Session:
+    """Return the lazily initialized module-level Autotask session."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                retry_strategy = Retry(
+                    total=SETTINGS.max_retries,
+                    backoff_factor=SETTINGS.retry_delay,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    allowed_methods=["POST"]
+                )
+                adapter = HTTPAdapter(max_retries=retry_strategy)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
 
 def create_autotask_ticket(
     title: str,
@@ -37,46 +102,30 @@ def create_autotask_ticket(
         logger.warning(f"Autotask not fully configured. Missing: {', '.join(missing_config)}")
         return False, f"Autotask not fully configured. Missing: {', '.join(missing_config)}", None
 
-    # Prepare request
-    url = f"{SETTINGS.at_base_url.rstrip('/')}/tickets"
-    headers = {
-        "ApiIntegrationCode": SETTINGS.at_api_integration_code,
-        "UserName": SETTINGS.at_username,
-        "Secret": SETTINGS.at_secret,
-        "Content-Type": "application/json",
-    }
-    
+    # Prepare request from the pre-baked static parts
+    static = _get_at_static()
+    url = static["url"]
+    headers = static["headers"]
+
     # Validate and prepare payload
     try:
+        prio = int(priority or static["default_priority"])
+        if not (1 <= prio <= 5):
+            logger.warning(f"Invalid priority {prio}, using default")
+            prio = static["default_priority"]
         payload = {
             "title": title[:255],  # Truncate title if too long
             "description": description[:10000],  # Truncate description if too long
             "status": 1,  # New status
-            "queueID": int(SETTINGS.at_queue_id),
-            "accountID": int(SETTINGS.at_account_id),
-            "priority": int(priority or SETTINGS.at_ticket_priority),
+            "queueID": static["queue_id"],
+            "accountID": static["account_id"],
+            "priority": prio,
         }
-        
-        # Validate priority range
-        if not (1 <= payload["priority"] <= 5):
-            logger.warning(f"Invalid priority {payload['priority']}, using default")
-            payload["priority"] = SETTINGS.at_ticket_priority
-            
     except (ValueError, TypeError) as e:
         logger.error(f"Invalid payload data: {e}")
         return False, f"Invalid payload data: {e}", None
 
-    # Create session with retry logic
-    session = requests.Session()
-    retry_strategy = Retry(
-        total=SETTINGS.max_retries,
-        backoff_factor=SETTINGS.retry_delay,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["POST"]
-    )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
+    session = _get_session()
 
     # Make request with retry logic
     try:
@@ -84,8 +133,8 @@ def create_autotask_ticket(
         response = session.post(
             url,
             headers=headers,
-            json=payload,
-            timeout=SETTINGS.http_timeout,
+            data=orjson.dumps(payload),
+            timeout=_HTTP_TIMEOUT,
         )
         
         # Handle different response codes
@@ -16,6 +16,8 @@ class Settings(BaseSettings):
     max_request_size: int = Field(default=1048576, ge=1024, env="MAX_REQUEST_SIZE")  # 1MB
     rate_limit_requests: int = Field(default=100, ge=1, env="RATE_LIMIT_REQUESTS")
     rate_limit_window: int = Field(default=3600, ge=1, env="RATE_LIMIT_WINDOW")  # 1 hour
+    rate_limit_max_clients: int = Field(default=10000, ge=1, env="RATE_LIMIT_MAX_CLIENTS")
+    trusted_proxies: List[str] = Field(default_factory=list, env="TRUSTED_PROXIES")
     cors_origins: List[str] = Field(default_factory=lambda: ["*"], env="CORS_ORIGINS")
     
     # Feature flags
@@ -49,10 +51,13 @@ class Settings(BaseSettings):
     # Scoring
     score_high: int = Field(default=70, ge=0, le=100, env="SCORE_HIGH")
     score_medium: int = Field(default=40, ge=0, le=100, env="SCORE_MEDIUM")
+    intel_threshold: int = Field(default=30, ge=0, le=100, env="INTEL_THRESHOLD")
 
     # HTTP / Cache
     http_timeout: float = Field(default=8.0, ge=1.0, le=60.0, env="HTTP_TIMEOUT")
     ioc_cache_ttl: int = Field(default=1800, ge=60, env="IOC_CACHE_TTL")
+    ioc_cache_maxsize: int = Field(default=10000, ge=1, env="IOC_CACHE_MAXSIZE")
+    redis_url: Optional[str] = Field(default=None, env="REDIS_URL")
     max_retries: int = Field(default=3, ge=0, le=10, env="MAX_RETRIES")
     retry_delay: float = Field(default=1.0, ge=0.1, le=10.0, env="RETRY_DELAY")
 
@@ -85,6 +90,20 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in v.split(",")]
         return v
 
+    @field_validator("trusted_proxies", mode="before")
+    @classmethod
+    def parse_trusted_proxies(cls, v):
+        if isinstance(v, str):
+            return [cidr.strip() for cidr in v.split(",") if cidr.strip()]
+        return v
+
+    @field_validator("trusted_proxies")
+    @classmethod
+    def validate_trusted_proxies(cls, v):
+        for cidr in v:
+            ipaddress.ip_network(cidr)
+        return v
+
     @field_validator("email_to", mode="before")
     @classmethod
     def parse_email_to(cls, v):
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
 from sqlalchemy import (
@@ -11,28 +11,91 @@ from sqlalchemy import (
     Column,
     DateTime,
     Float,
+    Index,
     Integer,
     JSON,
     String,
     Text,
+    case,
     create_engine,
+    insert,
+    lambda_stmt,
+    select,
     desc,
     func,
+    text,
+    tuple_,
 )
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import defer, sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 
 from .config import SETTINGS
 
 Base = declarative_base()
 
+# Field order for Alert.to_dict, cached once instead of rebuilding a 24-entry
+# dict literal per row. Datetimes stay native: orjson (the response serializer)
+# emits them as ISO strings without per-row isoformat() calls.
+_ALERT_DICT_FIELDS = (
+    "id",
+    "source",
+    "event_type",
+    "severity",
+    "timestamp",
+    "message",
+    "ip",
+    "username",
+    "category",
+    "recommended_action",
+    "base_score",
+    "intel_score",
+    "final_score",
+    "iocs",
+    "intel_data",
+    "status",
+    "assigned_to",
+    "notes",
+    "email_sent",
+    "ticket_created",
+    "ticket_id",
+    "raw_data",
+    "created_at",
+    "updated_at",
+)
+_ALERT_SUMMARY_FIELDS = tuple(
+    f for f in _ALERT_DICT_FIELDS if f not in ("iocs", "intel_data", "raw_data")
+)
+
 
 class Alert(Base):
     """Alert model for storing security events."""
     
     __tablename__ = "alerts"
-    
+
+    # Composite indexes back the dashboard statistics and listing filters,
+    # which always combine the created_at window with severity/status; the
+    # partial indexes cover the action counters (email_sent/ticket_created
+    # are almost always false, so the full-column index is mostly dead rows).
+    __table_args__ = (
+        Index("ix_alerts_created_severity", "created_at", "severity"),
+        Index("ix_alerts_created_status", "created_at", "status"),
+        # Backs the (timestamp, id) keyset pagination cursor
+        Index("ix_alerts_timestamp_id", "timestamp", "id"),
+        Index(
+            "ix_alerts_email_sent_true",
+            "created_at",
+            postgresql_where=text("email_sent = true"),
+            sqlite_where=text("email_sent = 1"),
+        ),
+        Index(
+            "ix_alerts_ticket_created_true",
+            "created_at",
+            postgresql_where=text("ticket_created = true"),
+            sqlite_where=text("ticket_created = 1"),
+        ),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     source = Column(String(100), nullable=True, index=True)
     event_type = Column(String(100), nullable=True, index=True)
@@ -70,32 +133,12 @@ class Alert(Base):
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert alert to dictionary."""
-        return {
-            "id": self.id,
-            "source": self.source,
-            "event_type": self.event_type,
-            "severity": self.severity,
-            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
-            "message": self.message,
-            "ip": self.ip,
-            "username": self.username,
-            "category": self.category,
-            "recommended_action": self.recommended_action,
-            "base_score": self.base_score,
-            "intel_score": self.intel_score,
-            "final_score": self.final_score,
-            "iocs": self.iocs,
-            "intel_data": self.intel_data,
-            "status": self.status,
-            "assigned_to": self.assigned_to,
-            "notes": self.notes,
-            "email_sent": self.email_sent,
-            "ticket_created": self.ticket_created,
-            "ticket_id": self.ticket_id,
-            "raw_data": self.raw_data,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-        }
+        return {name: getattr(self, name) for name in _ALERT_DICT_FIELDS}
+
+    def to_summary_dict(self) -> Dict[str, Any]:
+        """Like to_dict but without the JSON blob columns (iocs, intel_data,
+        raw_data); safe to call on rows loaded with defer_json."""
+        return {name: getattr(self, name) for name in _ALERT_SUMMARY_FIELDS}
 
 
 class AlertStats(Base):
@@ -128,20 +171,49 @@ DATABASE_URL = get_database_url()
 
 # Create engine with appropriate configuration
 if DATABASE_URL.startswith('sqlite'):
+    # StaticPool only for in-memory databases, where every "connection" must
+    # be the same object; file-backed SQLite uses the default pool so threads
+    # get their own connections.
+    sqlite_kwargs: Dict[str, Any] = {"connect_args": {"check_same_thread": False}}
+    if ":memory:" in DATABASE_URL or DATABASE_URL == "sqlite://":
+        sqlite_kwargs["poolclass"] = StaticPool
+    engine = create_engine(DATABASE_URL, **sqlite_kwargs)
+else:
+    # Sized for concurrent API workers; pre_ping drops stale connections
+    # before they surface as request errors, recycle stays under common
+    # idle-timeout cutoffs, and LIFO keeps a small working set of backend
+    # connections hot.
     engine = create_engine(
         DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
+        pool_size=20,
+        max_overflow=40,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+        pool_use_lifo=True,
     )
-else:
-    engine = create_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+# Trigram GIN indexes let Postgres serve the unanchored ILIKE search in
+# get_alerts from an index instead of a sequential scan (pg_trgm accelerates
+# ILIKE transparently). SQLite has no equivalent, so these are Postgres-only.
+_PG_TRGM_INDEXES = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_alerts_message_trgm ON alerts USING gin (message gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_alerts_ip_trgm ON alerts USING gin (ip gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_alerts_username_trgm ON alerts USING gin (username gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_alerts_event_type_trgm ON alerts USING gin (event_type gin_trgm_ops)",
+)
+
+
 def create_tables():
     """Create all database tables."""
     Base.metadata.create_all(bind=engine)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            for stmt in _PG_TRGM_INDEXES:
+                conn.execute(text(stmt))
 
 
 def get_db() -> Session:
@@ -153,6 +225,37 @@ def get_db() -> Session:
         db.close()
 
 
+def _alert_payload(
+    event_data: Dict[str, Any],
+    analysis_result: Dict[str, Any],
+    actions_taken: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Map an analyzed event onto Alert column values."""
+    iocs = analysis_result.get("iocs", {})
+    intel_data = analysis_result.get("intel", {})
+
+    return {
+        "source": event_data.get("source"),
+        "event_type": event_data.get("event_type"),
+        "severity": event_data.get("severity", 0),
+        "timestamp": datetime.fromisoformat(event_data.get("timestamp", datetime.utcnow().isoformat()).replace("Z", "+00:00")) if event_data.get("timestamp") else datetime.utcnow(),
+        "message": event_data.get("message"),
+        "ip": event_data.get("ip"),
+        "username": event_data.get("username"),
+        "category": analysis_result.get("category"),
+        "recommended_action": analysis_result.get("recommended_action"),
+        "base_score": analysis_result.get("scores", {}).get("base", 0),
+        "intel_score": analysis_result.get("scores", {}).get("intel", 0),
+        "final_score": analysis_result.get("scores", {}).get("final", 0),
+        "iocs": iocs,
+        "intel_data": intel_data,
+        "email_sent": actions_taken.get("email", {}).get("ok", False),
+        "ticket_created": actions_taken.get("autotask_ticket", {}).get("ok", False),
+        "ticket_id": actions_taken.get("autotask_ticket", {}).get("response", {}).get("id") if actions_taken.get("autotask_ticket", {}).get("ok") else None,
+        "raw_data": event_data.get("raw", {}),
+    }
+
+
 def save_alert(
     db: Session,
     event_data: Dict[str, Any],
@@ -160,55 +263,58 @@ def save_alert(
     actions_taken: Dict[str, Any]
 ) -> Alert:
     """Save alert to database."""
-    
-    # Extract IOCs and intelligence data
-    iocs = analysis_result.get("iocs", {})
-    intel_data = analysis_result.get("intel", {})
-    
-    # Create alert record
-    alert = Alert(
-        source=event_data.get("source"),
-        event_type=event_data.get("event_type"),
-        severity=event_data.get("severity", 0),
-        timestamp=datetime.fromisoformat(event_data.get("timestamp", datetime.utcnow().isoformat()).replace("Z", "+00:00")) if event_data.get("timestamp") else datetime.utcnow(),
-        message=event_data.get("message"),
-        ip=event_data.get("ip"),
-        username=event_data.get("username"),
-        category=analysis_result.get("category"),
-        recommended_action=analysis_result.get("recommended_action"),
-        base_score=analysis_result.get("scores", {}).get("base", 0),
-        intel_score=analysis_result.get("scores", {}).get("intel", 0),
-        final_score=analysis_result.get("scores", {}).get("final", 0),
-        iocs=iocs,
-        intel_data=intel_data,
-        email_sent=actions_taken.get("email", {}).get("ok", False),
-        ticket_created=actions_taken.get("autotask_ticket", {}).get("ok", False),
-        ticket_id=actions_taken.get("autotask_ticket", {}).get("response", {}).get("id") if actions_taken.get("autotask_ticket", {}).get("ok") else None,
-        raw_data=event_data.get("raw", {}),
-    )
-    
+    alert = Alert(**_alert_payload(event_data, analysis_result, actions_taken))
+
     db.add(alert)
     db.commit()
     db.refresh(alert)
-    
+
     return alert
 
 
-def get_alerts(
+def save_alerts(
     db: Session,
-    skip: int = 0,
-    limit: int = 100,
+    events: List[Dict[str, Any]]
+) -> List[int]:
+    """Save a batch of analyzed events in a single INSERT.
+
+    Each entry needs ``event_data``, ``analysis_result`` and ``actions_taken``
+    keys (the save_alert arguments). One executemany round-trip replaces the
+    per-alert INSERT/commit/refresh cycle during ingest bursts. Returns the
+    new alert ids in input order.
+    """
+    if not events:
+        return []
+
+    payloads = [
+        _alert_payload(
+            entry["event_data"], entry["analysis_result"], entry["actions_taken"]
+        )
+        for entry in events
+    ]
+    # sort_by_parameter_order: under insertmanyvalues the RETURNING rows are
+    # not otherwise guaranteed to line up with the parameter batch
+    ids = db.execute(
+        insert(Alert).returning(Alert.id, sort_by_parameter_order=True), payloads
+    ).scalars().all()
+    db.commit()
+    # The Core executemany bypasses ORM mapper events, so the after_insert
+    # listener that drops the /filters cache never fires here — invalidate
+    # explicitly. Imported lazily since api imports this module at load.
+    from .api import invalidate_filter_cache
+    invalidate_filter_cache()
+    return list(ids)
+
+
+def _apply_alert_filters(
+    query,
     status: Optional[str] = None,
     severity: Optional[int] = None,
     source: Optional[str] = None,
     category: Optional[str] = None,
-    search: Optional[str] = None
-) -> List[Alert]:
-    """Get alerts with filtering and pagination."""
-    
-    query = db.query(Alert)
-    
-    # Apply filters
+    search: Optional[str] = None,
+):
+    """Apply the shared listing/count filters to an Alert query."""
     if status:
         query = query.filter(Alert.status == status)
     if severity is not None:
@@ -225,13 +331,181 @@ def get_alerts(
             (Alert.username.ilike(search_term)) |
             (Alert.event_type.ilike(search_term))
         )
-    
-    # Order by timestamp descending
-    query = query.order_by(desc(Alert.timestamp))
-    
+    return query
+
+
+def _paginate_alerts(query, skip, limit, before_ts, before_id):
+    """Order and page an Alert query, preferring a keyset cursor over OFFSET.
+
+    With a (before_ts, before_id) cursor the database seeks directly into the
+    (timestamp, id) index instead of scanning and discarding ``skip`` rows.
+    """
+    query = query.order_by(desc(Alert.timestamp), desc(Alert.id))
+    if before_ts is not None and before_id is not None:
+        query = query.filter(tuple_(Alert.timestamp, Alert.id) < (before_ts, before_id))
+        return query.limit(limit).all()
     return query.offset(skip).limit(limit).all()
 
 
+def get_alerts(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    severity: Optional[int] = None,
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    before_ts: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    defer_json: bool = False
+) -> List[Alert]:
+    """Get alerts with filtering and pagination.
+
+    With defer_json the multi-KB JSON columns (iocs, intel_data, raw_data)
+    are not fetched; pair with to_summary_dict for list views.
+
+    Built as a lambda statement: the small set of filter shapes means the
+    statement construction and compiled SQL are cached by lambda identity
+    instead of being rebuilt on every call.
+    """
+    stmt = lambda_stmt(lambda: select(Alert))
+    if status:
+        stmt += lambda s: s.where(Alert.status == status)
+    if severity is not None:
+        stmt += lambda s: s.where(Alert.severity == severity)
+    if source:
+        stmt += lambda s: s.where(Alert.source == source)
+    if category:
+        stmt += lambda s: s.where(Alert.category == category)
+    if search:
+        search_term = f"%{search}%"
+        stmt += lambda s: s.where(
+            (Alert.message.ilike(search_term)) |
+            (Alert.ip.ilike(search_term)) |
+            (Alert.username.ilike(search_term)) |
+            (Alert.event_type.ilike(search_term))
+        )
+    if defer_json:
+        stmt += lambda s: s.options(
+            defer(Alert.iocs), defer(Alert.intel_data), defer(Alert.raw_data)
+        )
+    stmt += lambda s: s.order_by(desc(Alert.timestamp), desc(Alert.id))
+    if before_ts is not None and before_id is not None:
+        # Row-value comparisons aren't lambda-trackable; build the criterion
+        # outside so only its bound values feed the cache key.
+        cursor = tuple_(Alert.timestamp, Alert.id) < (before_ts, before_id)
+        stmt += lambda s: s.where(cursor).limit(limit)
+    else:
+        stmt += lambda s: s.offset(skip).limit(limit)
+
+    return db.scalars(stmt).all()
+
+
+def stream_alerts(
+    db: Session,
+    status: Optional[str] = None,
+    severity: Optional[int] = None,
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    batch_size: int = 1000,
+):
+    """Iterate matching alerts as dicts with bounded memory, for exports.
+
+    Server-side cursoring (stream_results) plus yield_per keeps memory at
+    O(batch_size) instead of materializing every row like .all(); on
+    Postgres this runs over a named cursor.
+    """
+    query = _apply_alert_filters(
+        db.query(Alert),
+        status=status,
+        severity=severity,
+        source=source,
+        category=category,
+        search=search,
+    )
+    query = (
+        query.order_by(desc(Alert.timestamp), desc(Alert.id))
+        .execution_options(stream_results=True)
+        .yield_per(batch_size)
+    )
+    for alert in query:
+        yield alert.to_dict()
+
+
+# Columns for list views: everything except the JSON blobs (iocs, intel_data,
+# raw_data), which are often multi-KB per row and unused in listings.
+_ALERT_SUMMARY_COLS = (
+    Alert.id,
+    Alert.source,
+    Alert.event_type,
+    Alert.severity,
+    Alert.timestamp,
+    Alert.message,
+    Alert.ip,
+    Alert.username,
+    Alert.category,
+    Alert.recommended_action,
+    Alert.base_score,
+    Alert.intel_score,
+    Alert.final_score,
+    Alert.status,
+    Alert.assigned_to,
+    Alert.notes,
+    Alert.email_sent,
+    Alert.ticket_created,
+    Alert.ticket_id,
+    Alert.created_at,
+    Alert.updated_at,
+)
+
+
+def get_alert_summaries(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    severity: Optional[int] = None,
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    before_ts: Optional[datetime] = None,
+    before_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Like get_alerts but projecting summary columns only, skipping ORM hydration."""
+    query = _apply_alert_filters(
+        db.query(*_ALERT_SUMMARY_COLS),
+        status=status,
+        severity=severity,
+        source=source,
+        category=category,
+        search=search,
+    )
+    rows = _paginate_alerts(query, skip, limit, before_ts, before_id)
+    return [dict(row._mapping) for row in rows]
+
+
+def count_alerts(
+    db: Session,
+    status: Optional[str] = None,
+    severity: Optional[int] = None,
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    search: Optional[str] = None
+) -> int:
+    """Count alerts matching the same filters as get_alerts."""
+    query = _apply_alert_filters(
+        db.query(func.count(Alert.id)),
+        status=status,
+        severity=severity,
+        source=source,
+        category=category,
+        search=search,
+    )
+    return query.scalar() or 0
+
+
 def get_alert_by_id(db: Session, alert_id: int) -> Optional[Alert]:
     """Get alert by ID."""
     return db.query(Alert).filter(Alert.id == alert_id).first()
@@ -260,85 +534,79 @@ def update_alert_status(
 
 def get_alert_statistics(db: Session, days: int = 7) -> Dict[str, Any]:
     """Get alert statistics for dashboard."""
-    
-    # Get date range
-    end_date = datetime.utcnow()
-    start_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    start_date = start_date.replace(day=start_date.day - days)
-    
-    # Total alerts
-    total_alerts = db.query(Alert).filter(Alert.created_at >= start_date).count()
-    
-    # Alerts by severity
-    high_severity = db.query(Alert).filter(
-        Alert.created_at >= start_date,
-        Alert.severity >= 7
-    ).count()
-    
-    medium_severity = db.query(Alert).filter(
-        Alert.created_at >= start_date,
-        Alert.severity >= 4,
-        Alert.severity < 7
-    ).count()
-    
-    low_severity = db.query(Alert).filter(
-        Alert.created_at >= start_date,
-        Alert.severity < 4
-    ).count()
-    
-    # Alerts by status
-    new_alerts = db.query(Alert).filter(
-        Alert.created_at >= start_date,
-        Alert.status == "new"
-    ).count()
-    
-    acknowledged_alerts = db.query(Alert).filter(
-        Alert.created_at >= start_date,
-        Alert.status == "acknowledged"
-    ).count()
-    
-    resolved_alerts = db.query(Alert).filter(
-        Alert.created_at >= start_date,
-        Alert.status == "resolved"
-    ).count()
-    
-    false_positives = db.query(Alert).filter(
-        Alert.created_at >= start_date,
-        Alert.status == "false_positive"
-    ).count()
-    
-    # Actions taken
-    emails_sent = db.query(Alert).filter(
-        Alert.created_at >= start_date,
-        Alert.email_sent == True
-    ).count()
-    
-    tickets_created = db.query(Alert).filter(
-        Alert.created_at >= start_date,
-        Alert.ticket_created == True
-    ).count()
-    
-    # Recent alerts (last 24 hours)
-    recent_alerts = db.query(Alert).filter(
-        Alert.created_at >= datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    ).count()
-    
+
+    # Get date range (timedelta avoids the day-of-month underflow of replace())
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    start_date = today_start - timedelta(days=days)
+
+    def bucket(condition):
+        return func.sum(case((condition, 1), else_=0))
+
+    # All counters come from a single scan over the date window instead of
+    # eleven separate COUNT(*) round-trips.
+    row = db.query(
+        func.count(Alert.id).label("total_alerts"),
+        bucket(Alert.severity >= 7).label("high_severity"),
+        bucket((Alert.severity >= 4) & (Alert.severity < 7)).label("medium_severity"),
+        bucket(Alert.severity < 4).label("low_severity"),
+        bucket(Alert.status == "new").label("new_alerts"),
+        bucket(Alert.status == "acknowledged").label("acknowledged_alerts"),
+        bucket(Alert.status == "resolved").label("resolved_alerts"),
+        bucket(Alert.status == "false_positive").label("false_positives"),
+        bucket(Alert.email_sent == True).label("emails_sent"),
+        bucket(Alert.ticket_created == True).label("tickets_created"),
+        bucket(Alert.created_at >= today_start).label("recent_alerts"),
+    ).filter(Alert.created_at >= start_date).one()
+
     return {
-        "total_alerts": total_alerts,
-        "high_severity": high_severity,
-        "medium_severity": medium_severity,
-        "low_severity": low_severity,
-        "new_alerts": new_alerts,
-        "acknowledged_alerts": acknowledged_alerts,
-        "resolved_alerts": resolved_alerts,
-        "false_positives": false_positives,
-        "emails_sent": emails_sent,
-        "tickets_created": tickets_created,
-        "recent_alerts": recent_alerts,
+        "total_alerts": row.total_alerts or 0,
+        "high_severity": int(row.high_severity or 0),
+        "medium_severity": int(row.medium_severity or 0),
+        "low_severity": int(row.low_severity or 0),
+        "new_alerts": int(row.new_alerts or 0),
+        "acknowledged_alerts": int(row.acknowledged_alerts or 0),
+        "resolved_alerts": int(row.resolved_alerts or 0),
+        "false_positives": int(row.false_positives or 0),
+        "emails_sent": int(row.emails_sent or 0),
+        "tickets_created": int(row.tickets_created or 0),
+        "recent_alerts": int(row.recent_alerts or 0),
         "period_days": days,
     }
 
 
+def get_alert_timeseries(db: Session, days: int = 30) -> List[Dict[str, Any]]:
+    """Per-day alert counts over the window, computed in a single GROUP BY
+    instead of one query per day."""
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    start_date = today_start - timedelta(days=days)
+
+    if engine.dialect.name == "postgresql":
+        day = func.date_trunc("day", Alert.created_at)
+    else:  # SQLite has no date_trunc; date() truncates to the day
+        day = func.date(Alert.created_at)
+
+    rows = (
+        db.query(
+            day.label("day"),
+            func.count(Alert.id).label("total"),
+            func.sum(case((Alert.severity >= 7, 1), else_=0)).label("high_severity"),
+        )
+        .filter(Alert.created_at >= start_date)
+        .group_by(day)
+        .order_by(day)
+        .all()
+    )
+
+    return [
+        {
+            "day": str(row.day),
+            "total": row.total,
+            "high_severity": int(row.high_severity or 0),
+        }
+        for row in rows
+    ]
+
+
 def get_top_sources(db: Session, limit: int = 10) -> List[Dict[str, Any]]:
     """Get top alert sources."""
     result = db.query(
@@ -1,18 +1,32 @@
 from __future__ import annotations
 
+import json
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Any, Dict, List, Optional
 
+import cachetools
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+try:  # Optional shared cache backend; falls back to in-memory when absent
+    import redis
+except ImportError:  # pragma: no cover - depends on deployment
+    redis = None
+
 from ..config import SETTINGS
 from .providers import abuseipdb, otx, virustotal
 
 logger = logging.getLogger(__name__)
 
+# Cache lookups sit on the per-event hot path: if Redis is configured but
+# unreachable, every read must fail fast instead of blocking on the OS TCP
+# timeout before falling back.
+_REDIS_SOCKET_TIMEOUT = 0.5
+
 
 class IntelClient:
     def __init__(self):
@@ -30,32 +44,137 @@ class IntelClient:
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
         
-        # Simple in-memory cache (in production, use Redis or similar)
-        self._cache: Dict[str, Dict[str, Any]] = {}
-        self._cache_timestamps: Dict[str, float] = {}
+        # Shared Redis cache when configured (cross-worker hits, TTL-managed
+        # eviction), otherwise a bounded in-memory dict.
+        self._redis = None
+        if redis is not None and SETTINGS.redis_url:
+            try:
+                self._redis = redis.Redis.from_url(
+                    SETTINGS.redis_url,
+                    socket_connect_timeout=_REDIS_SOCKET_TIMEOUT,
+                    socket_timeout=_REDIS_SOCKET_TIMEOUT,
+                )
+            except Exception as e:
+                logger.warning("Redis cache unavailable, using in-memory cache: %s", e)
+        # TTLCache folds the timestamp bookkeeping into one structure: a hit
+        # is a single lookup and expiry/size eviction happen on insert,
+        # replacing the previous dict-pair with manual expiry scans. Guarded
+        # by a lock since lookups run on the batch/provider pools.
+        self._cache: cachetools.TTLCache = cachetools.TTLCache(
+            maxsize=SETTINGS.ioc_cache_maxsize, ttl=SETTINGS.ioc_cache_ttl
+        )
+        self._cache_lock = threading.Lock()
+
+        # One worker per provider: the three lookups are independent HTTPS
+        # round-trips, so running them concurrently bounds enrich_ip latency
+        # by the slowest provider instead of the sum.
+        self._provider_pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="intel-provider")
+
+        # Separate pool for batch enrichment so enrich_ips fan-out cannot
+        # starve the provider pool its workers submit into.
+        self._batch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="intel-batch")
 
     def _get_cached_result(self, ip: str) -> Optional[Dict[str, Any]]:
         """Get cached result if still valid."""
         if not SETTINGS.enable_caching:
             return None
-            
-        if ip in self._cache:
-            cache_time = self._cache_timestamps.get(ip, 0)
-            if time.time() - cache_time < SETTINGS.ioc_cache_ttl:
-                logger.debug(f"Cache hit for IP: {ip}")
-                return self._cache[ip]
-            else:
-                # Remove expired entry
-                self._cache.pop(ip, None)
-                self._cache_timestamps.pop(ip, None)
-        return None
+
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(f"intel:ip:{ip}")
+            except Exception as e:
+                logger.warning("Redis cache read failed: %s", e)
+                return None
+            if raw:
+                logger.debug("Cache hit for IP: %s", ip)
+                return json.loads(raw)
+            return None
+
+        with self._cache_lock:
+            result = self._cache.get(ip)
+        if result is not None:
+            logger.debug("Cache hit for IP: %s", ip)
+        return result
 
     def _cache_result(self, ip: str, result: Dict[str, Any]) -> None:
         """Cache the result."""
-        if SETTINGS.enable_caching:
+        if not SETTINGS.enable_caching:
+            return
+
+        if self._redis is not None:
+            try:
+                self._redis.setex(
+                    f"intel:ip:{ip}", SETTINGS.ioc_cache_ttl, json.dumps(result, default=str)
+                )
+            except Exception as e:
+                logger.warning("Redis cache write failed: %s", e)
+            return
+
+        # TTLCache evicts expired/oldest entries on insert, keeping the
+        # cache bounded without a manual scan
+        with self._cache_lock:
             self._cache[ip] = result
-            self._cache_timestamps[ip] = time.time()
-            logger.debug(f"Cached result for IP: {ip}")
+        logger.debug("Cached result for IP: %s", ip)
+
+    @staticmethod
+    def _score_otx(data: Dict[str, Any]) -> int:
+        pulses = len(data.get("pulse_info", {}).get("pulses", []))
+        return min(30, 10 + pulses) if pulses else 0
+
+    @staticmethod
+    def _score_virustotal(data: Dict[str, Any]) -> int:
+        stats = data.get("data", {}).get("attributes", {}).get("last_analysis_stats", {})
+        malicious = int(stats.get("malicious", 0))
+        suspicious = int(stats.get("suspicious", 0))
+        if malicious or suspicious:
+            return min(40, 5 * (malicious + suspicious))
+        return 0
+
+    @staticmethod
+    def _score_abuseipdb(data: Dict[str, Any]) -> int:
+        score = int(data.get("data", {}).get("abuseConfidenceScore", 0))
+        return min(50, score) if score else 0
+
+    def _enabled_providers(self):
+        """(source key, error key, label, lookup, scorer) for configured providers."""
+        providers = []
+        if SETTINGS.otx_api_key:
+            providers.append(("otx", "otx_error", "OTX", otx.lookup_ip, self._score_otx))
+        if SETTINGS.vt_api_key:
+            providers.append(
+                ("virustotal", "vt_error", "VirusTotal", virustotal.lookup_ip, self._score_virustotal)
+            )
+        if SETTINGS.abuseipdb_api_key:
+            providers.append(
+                ("abuseipdb", "abuseipdb_error", "AbuseIPDB", abuseipdb.lookup_ip, self._score_abuseipdb)
+            )
+        return providers
+
+    def _acquire_flight_lock(self, ip: str) -> Optional[str]:
+        """Single-flight: claim the enrichment of ``ip``, or wait for the holder.
+
+        Returns the lock key if this caller should perform the lookup, or
+        None if another worker's freshly cached result was reused (in which
+        case the cached result is guaranteed to be present) or Redis is not
+        in play. Callers must delete the returned key when done.
+        """
+        if self._redis is None:
+            return None
+        lock_key = f"intel:lock:{ip}"
+        try:
+            acquired = self._redis.set(lock_key, "1", nx=True, ex=int(SETTINGS.http_timeout * 3))
+        except Exception:
+            return None
+        if acquired:
+            return lock_key
+        # Another worker is enriching this IP; poll briefly for its result
+        deadline = time.monotonic() + SETTINGS.http_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            if self._get_cached_result(ip):
+                return None
+        # Holder is slow or died; do our own lookup without the lock
+        return None
 
     def enrich_ip(self, ip: str) -> Dict[str, Any]:
         """Enrich IP with threat intelligence from multiple sources."""
@@ -64,64 +183,44 @@ class IntelClient:
         if cached_result:
             return cached_result
 
+        lock_key = self._acquire_flight_lock(ip)
+        if lock_key is None and self._redis is not None:
+            # May have been populated by the worker we coalesced onto
+            cached_result = self._get_cached_result(ip)
+            if cached_result:
+                return cached_result
+
         results: Dict[str, Any] = {
-            "indicator": ip, 
-            "sources": {}, 
-            "score": 0, 
+            "indicator": ip,
+            "sources": {},
+            "score": 0,
             "labels": [],
             "enriched_at": time.time()
         }
         votes: List[int] = []
         errors: List[str] = []
 
-        # OTX lookup
-        if SETTINGS.otx_api_key:
-            try:
-                data = otx.lookup_ip(self.session, ip, SETTINGS.http_timeout)
-                results["sources"]["otx"] = data
-                pulses = len(data.get("pulse_info", {}).get("pulses", []))
-                if pulses:
-                    score = min(30, 10 + pulses)
-                    votes.append(score)
-                    logger.debug(f"OTX score for {ip}: {score}")
-            except Exception as e:
-                error_msg = f"OTX lookup failed: {str(e)}"
-                errors.append(error_msg)
-                results["sources"]["otx_error"] = error_msg
-                logger.warning(error_msg)
-
-        # VirusTotal lookup
-        if SETTINGS.vt_api_key:
-            try:
-                data = virustotal.lookup_ip(self.session, ip, SETTINGS.http_timeout)
-                results["sources"]["virustotal"] = data
-                stats = data.get("data", {}).get("attributes", {}).get("last_analysis_stats", {})
-                malicious = int(stats.get("malicious", 0))
-                suspicious = int(stats.get("suspicious", 0))
-                if malicious or suspicious:
-                    score = min(40, 5 * (malicious + suspicious))
-                    votes.append(score)
-                    logger.debug(f"VT score for {ip}: {score}")
-            except Exception as e:
-                error_msg = f"VirusTotal lookup failed: {str(e)}"
-                errors.append(error_msg)
-                results["sources"]["vt_error"] = error_msg
-                logger.warning(error_msg)
-
-        # AbuseIPDB lookup
-        if SETTINGS.abuseipdb_api_key:
+        # Fan the configured provider lookups out concurrently, keeping the
+        # per-provider error handling so one failing feed degrades gracefully.
+        providers = self._enabled_providers()
+        futures = {
+            self._provider_pool.submit(lookup, self.session, ip, SETTINGS.http_timeout):
+                (source_key, error_key, label, scorer)
+            for source_key, error_key, label, lookup, scorer in providers
+        }
+        for future in as_completed(futures):
+            source_key, error_key, label, scorer = futures[future]
             try:
-                data = abuseipdb.lookup_ip(self.session, ip, SETTINGS.http_timeout)
-                results["sources"]["abuseipdb"] = data
-                score = int(data.get("data", {}).get("abuseConfidenceScore", 0))
+                data = future.result()
+                results["sources"][source_key] = data
+                score = scorer(data)
                 if score:
-                    score = min(50, score)
                     votes.append(score)
-                    logger.debug(f"AbuseIPDB score for {ip}: {score}")
+                    logger.debug("%s score for %s: %s", label, ip, score)
             except Exception as e:
-                error_msg = f"AbuseIPDB lookup failed: {str(e)}"
+                error_msg = f"{label} lookup failed: {str(e)}"
                 errors.append(error_msg)
-                results["sources"]["abuseipdb_error"] = error_msg
+                results["sources"][error_key] = error_msg
                 logger.warning(error_msg)
 
         # Calculate final score
@@ -139,16 +238,89 @@ class IntelClient:
         else:
             results["labels"].append("unknown")
 
-        # Cache the result
+        # Cache the result and release the single-flight lock
         self._cache_result(ip, results)
-        
-        logger.info(f"Enriched IP {ip}: score={agg}, labels={results['labels']}")
+        if lock_key is not None:
+            try:
+                self._redis.delete(lock_key)
+            except Exception:  # pragma: no cover - lock expires via TTL anyway
+                pass
+
+        logger.info("Enriched IP %s: score=%s, labels=%s", ip, agg, results['labels'])
         return results
 
+    def _enrich_ip_safe(self, ip: str) -> Dict[str, Any]:
+        """enrich_ip, degrading to a neutral record instead of raising."""
+        try:
+            return self.enrich_ip(ip)
+        except Exception as e:
+            logger.warning("Intel enrichment failed for %s: %s", ip, e)
+            return {
+                "indicator": ip,
+                "sources": {},
+                "score": 0,
+                "labels": ["unknown"],
+                "errors": [str(e)],
+            }
+
+    def enrich_ips(self, ips: List[str]) -> List[Dict[str, Any]]:
+        """Batch-enrich IPs: one bulk cache probe, parallel lookups for misses.
+
+        Results come back aligned with the input order (duplicates share one
+        lookup).
+        """
+        unique_ips = list(dict.fromkeys(ips))
+        results: Dict[str, Dict[str, Any]] = {}
+
+        # Bulk cache probe: a single MGET against Redis instead of one GET
+        # per IP; the in-memory cache is just dict lookups.
+        if SETTINGS.enable_caching and self._redis is not None and unique_ips:
+            try:
+                raws = self._redis.mget([f"intel:ip:{ip}" for ip in unique_ips])
+            except Exception as e:
+                logger.warning("Redis cache read failed: %s", e)
+            else:
+                for ip, raw in zip(unique_ips, raws):
+                    if raw:
+                        results[ip] = json.loads(raw)
+        else:
+            for ip in unique_ips:
+                cached = self._get_cached_result(ip)
+                if cached:
+                    results[ip] = cached
+
+        misses = [ip for ip in unique_ips if ip not in results]
+        if len(misses) > 1:
+            for ip, enriched in zip(misses, self._batch_pool.map(self._enrich_ip_safe, misses)):
+                results[ip] = enriched
+        elif misses:
+            results[misses[0]] = self._enrich_ip_safe(misses[0])
+
+        return [results[ip] for ip in ips]
+
+    @property
+    def cache_size(self) -> int:
+        """Number of entries in the local cache (O(1) — TTLCache tracks it).
+
+        With Redis configured the cache lives out of process; counting it
+        would mean a keyspace scan per /metrics call, so report 0 there.
+        """
+        if self._redis is not None:
+            return 0
+        with self._cache_lock:
+            return len(self._cache)
+
     def clear_cache(self) -> None:
         """Clear the cache."""
-        self._cache.clear()
-        self._cache_timestamps.clear()
+        if self._redis is not None:
+            try:
+                keys = list(self._redis.scan_iter("intel:ip:*"))
+                if keys:
+                    self._redis.delete(*keys)
+            except Exception as e:
+                logger.warning("Redis cache clear failed: %s", e)
+        with self._cache_lock:
+            self._cache.clear()
         logger.info("Cache cleared")
 
 
@@ -1,12 +1,23 @@
 from __future__ import annotations
 
-import json
 import logging
 import sys
 from typing import Any, Dict
 
+import orjson
+
 from .config import SETTINGS
 
+# LogRecord attributes that are not caller-supplied extras, hoisted so the
+# per-record filter is one set difference instead of rebuilding this literal
+# on every format call.
+_RESERVED_ATTRS = frozenset({
+    "name", "msg", "args", "levelname", "levelno", "pathname", "filename",
+    "module", "exc_info", "exc_text", "stack_info", "lineno", "funcName",
+    "created", "msecs", "relativeCreated", "thread", "threadName",
+    "processName", "process", "getMessage"
+})
+
 
 class JsonFormatter(logging.Formatter):
     """JSON formatter for structured logging."""
@@ -36,16 +47,14 @@ class JsonFormatter(logging.Formatter):
             }
             
         # Add extra fields
-        for key, value in record.__dict__.items():
-            if key not in {
-                "name", "msg", "args", "levelname", "levelno", "pathname", "filename",
-                "module", "exc_info", "exc_text", "stack_info", "lineno", "funcName",
-                "created", "msecs", "relativeCreated", "thread", "threadName",
-                "processName", "process", "getMessage"
-            }:
-                payload[key] = value
-                
-        return json.dumps(payload, default=str)
+        attrs = record.__dict__
+        for key in attrs.keys() - _RESERVED_ATTRS:
+            payload[key] = attrs[key]
+
+
+        # orjson serializes in C (datetimes natively); default=str covers the
+        # odd non-serializable extra the same way json.dumps did.
+        return orjson.dumps(payload, default=str).decode()
 
 
 class TextFormatter(logging.Formatter):
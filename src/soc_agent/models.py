@@ -7,6 +7,13 @@ from typing import Any, Dict, Optional
 
 from pydantic import BaseModel, Field, field_validator
 
+# The injection-pattern alternation still needs a Python validator (it is a
+# reject-on-match check, not a shape constraint); compiled once at import so
+# each message gets a single scan.
+_DANGEROUS_RE = re.compile(
+    r"<script|javascript:|on\w+\s*=|eval\s*\(|exec\s*\(", re.IGNORECASE
+)
+
 
 class EventIn(BaseModel):
     source: Optional[str] = Field(default=None, max_length=100, description="Event source identifier")
@@ -20,7 +27,12 @@ class EventIn(BaseModel):
     timestamp: Optional[str] = Field(default=None, description="Event timestamp (ISO format)")
     message: Optional[str] = Field(default=None, max_length=10000, description="Event message")
     ip: Optional[str] = Field(default=None, description="IP address")
-    username: Optional[str] = Field(default=None, max_length=255, description="Username")
+    username: Optional[str] = Field(
+        default=None,
+        max_length=255,
+        description="Username",
+        pattern=r"^[a-zA-Z0-9._-]+$"
+    )
     raw: Dict[str, Any] = Field(default_factory=dict, description="Raw event data")
 
     @field_validator("ip")
@@ -47,32 +59,14 @@ class EventIn(BaseModel):
         except ValueError:
             raise ValueError("Invalid timestamp format. Use ISO format (e.g., 2023-01-01T00:00:00Z)")
 
-    @field_validator("username")
-    @classmethod
-    def validate_username(cls, v):
-        if v is None:
-            return v
-        # Basic username validation - alphanumeric, dots, underscores, hyphens
-        if not re.match(r"^[a-zA-Z0-9._-]+$", v):
-            raise ValueError("Username contains invalid characters")
-        return v
-
     @field_validator("message")
     @classmethod
     def validate_message(cls, v):
         if v is None:
             return v
         # Check for potential injection attempts
-        dangerous_patterns = [
-            r"<script",
-            r"javascript:",
-            r"on\w+\s*=",
-            r"eval\s*\(",
-            r"exec\s*\(",
-        ]
-        for pattern in dangerous_patterns:
-            if re.search(pattern, v, re.IGNORECASE):
-                raise ValueError("Message contains potentially dangerous content")
+        if _DANGEROUS_RE.search(v):
+            raise ValueError("Message contains potentially dangerous content")
         return v
 
     model_config = {
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+import queue
 import smtplib
 from email.message import EmailMessage
 from email.utils import formataddr
@@ -10,6 +11,62 @@ from .config import SETTINGS
 
 logger = logging.getLogger(__name__)
 
+# Pool of authenticated SMTP connections: the STARTTLS handshake plus LOGIN
+# dominates per-send latency during alert bursts, so idle connections are
+# kept and health-checked with NOOP on checkout instead of reconnecting for
+# every message.
+_SMTP_POOL_SIZE = 4
+_smtp_pool: queue.Queue = queue.Queue(maxsize=_SMTP_POOL_SIZE)
+
+
+def _connect_smtp() -> smtplib.SMTP:
+    """Open, secure, and authenticate a fresh SMTP connection."""
+    conn = smtplib.SMTP(SETTINGS.smtp_host, SETTINGS.smtp_port, timeout=30)
+    conn.set_debuglevel(0)
+    conn.starttls()
+    if SETTINGS.smtp_username and SETTINGS.smtp_password:
+        conn.login(SETTINGS.smtp_username, SETTINGS.smtp_password)
+    return conn
+
+
+def _checkout_smtp() -> smtplib.SMTP:
+    """Take a healthy pooled connection, or connect if none is reusable."""
+    while True:
+        try:
+            conn = _smtp_pool.get_nowait()
+        except queue.Empty:
+            return _connect_smtp()
+        try:
+            conn.noop()
+            return conn
+        except Exception:
+            _discard_smtp(conn)
+
+
+def _release_smtp(conn: smtplib.SMTP) -> None:
+    """Return a connection to the pool, closing it if the pool is full."""
+    try:
+        _smtp_pool.put_nowait(conn)
+    except queue.Full:
+        _discard_smtp(conn)
+
+
+def _discard_smtp(conn: smtplib.SMTP) -> None:
+    """Close a dead or surplus connection, ignoring teardown errors."""
+    try:
+        conn.quit()
+    except Exception:
+        pass
+
+
+def reset_smtp_pool() -> None:
+    """Drop pooled connections (call after SMTP settings change)."""
+    while True:
+        try:
+            _discard_smtp(_smtp_pool.get_nowait())
+        except queue.Empty:
+            return
+
 
 def send_email(subject: str, body: str, subtype: str = "plain") -> Tuple[bool, str]:
     """Send email notification with improved error handling and validation."""
@@ -31,7 +88,7 @@ def send_email(subject: str, body: str, subtype: str = "plain") -> Tuple[bool, s
             return False, "No valid recipients"
             
     except Exception as e:
-        logger.error(f"Email address validation failed: {e}")
+        logger.error("Email address validation failed: %s", e)
         return False, f"Invalid email addresses: {e}"
 
     # Create message
@@ -45,51 +102,54 @@ def send_email(subject: str, body: str, subtype: str = "plain") -> Tuple[bool, s
     try:
         msg.set_content(body, subtype=subtype, charset="utf-8")
     except Exception as e:
-        logger.error(f"Failed to set email content: {e}")
+        logger.error("Failed to set email content: %s", e)
         return False, f"Content encoding failed: {e}"
 
     # Send email with retry logic
     max_retries = 3
     for attempt in range(max_retries):
+        conn = None
         try:
-            with smtplib.SMTP(SETTINGS.smtp_host, SETTINGS.smtp_port, timeout=30) as s:
-                s.set_debuglevel(0)  # Disable debug output
-                
-                # Start TLS
-                s.starttls()
-                
-                # Authenticate if credentials provided
-                if SETTINGS.smtp_username and SETTINGS.smtp_password:
-                    s.login(SETTINGS.smtp_username, SETTINGS.smtp_password)
-                
-                # Send message
-                s.send_message(msg)
-                
-            logger.info(f"Email sent successfully to {len(to_addrs)} recipients")
+            conn = _checkout_smtp()
+            conn.send_message(msg)
+            _release_smtp(conn)
+
+            logger.info("Email sent successfully to %s recipients", len(to_addrs))
             return True, "sent"
-            
+
         except smtplib.SMTPAuthenticationError as e:
-            logger.error(f"SMTP authentication failed: {e}")
+            if conn is not None:
+                _discard_smtp(conn)
+            logger.error("SMTP authentication failed: %s", e)
             return False, f"Authentication failed: {e}"
             
         except smtplib.SMTPRecipientsRefused as e:
-            logger.error(f"Recipients refused: {e}")
+            # The connection survived the refusal; keep it for the next send
+            if conn is not None:
+                _release_smtp(conn)
+            logger.error("Recipients refused: %s", e)
             return False, f"Recipients refused: {e}"
-            
+
         except smtplib.SMTPServerDisconnected as e:
-            logger.warning(f"SMTP server disconnected (attempt {attempt + 1}): {e}")
+            if conn is not None:
+                _discard_smtp(conn)
+            logger.warning("SMTP server disconnected (attempt %s): %s", attempt + 1, e)
             if attempt == max_retries - 1:
                 return False, f"Server disconnected after {max_retries} attempts: {e}"
             continue
             
         except smtplib.SMTPException as e:
-            logger.error(f"SMTP error (attempt {attempt + 1}): {e}")
+            if conn is not None:
+                _discard_smtp(conn)
+            logger.error("SMTP error (attempt %s): %s", attempt + 1, e)
             if attempt == max_retries - 1:
                 return False, f"SMTP error after {max_retries} attempts: {e}"
             continue
             
         except Exception as e:
-            logger.error(f"Unexpected error sending email (attempt {attempt + 1}): {e}")
+            if conn is not None:
+                _discard_smtp(conn)
+            logger.error("Unexpected error sending email (attempt %s): %s", attempt + 1, e)
             if attempt == max_retries - 1:
                 return False, f"Unexpected error after {max_retries} attempts: {e}"
             continue
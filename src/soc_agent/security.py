@@ -10,7 +10,37 @@ class WebhookAuth:
     def verify_shared_secret(provided: Optional[str], expected: Optional[str]) -> bool:
         if not expected:
             return True
-        return hmac.compare_digest(provided or "", expected)
+        return hmac.compare_digest((provided or "").encode("utf-8"), expected.encode("utf-8"))
+
+    @staticmethod
+    def _decode_signature(signature: Optional[str], prefix: str) -> Optional[bytes]:
+        """Decode a (prefixed) hex signature to raw bytes; None if malformed.
+
+        Comparing raw bytes is tolerant of sender hex casing and folds the
+        length check into the constant-time comparison.
+        """
+        if not signature:
+            return None
+        if prefix and not signature.startswith(prefix):
+            return None
+        try:
+            return bytes.fromhex(signature[len(prefix):])
+        except ValueError:
+            return None
+
+    @staticmethod
+    def verify_hmac_digest(
+        digest: bytes, signature: Optional[str], prefix: str = "sha256="
+    ) -> bool:
+        """Verify a signature against an already-computed HMAC digest.
+
+        Lets callers that hash the body incrementally (e.g. while streaming
+        the request) verify without re-hashing the full payload.
+        """
+        provided = WebhookAuth._decode_signature(signature, prefix)
+        if provided is None:
+            return False
+        return hmac.compare_digest(provided, digest)
 
     @staticmethod
     def verify_hmac(
@@ -20,8 +50,5 @@ class WebhookAuth:
             return True
         if not signature:
             return False
-        if prefix and not signature.startswith(prefix):
-            return False
-        provided = signature[len(prefix) :]
-        digest = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
-        return hmac.compare_digest(provided, digest)
+        digest = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).digest()
+        return WebhookAuth.verify_hmac_digest(digest, signature, prefix)
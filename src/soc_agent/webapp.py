@@ -1,36 +1,131 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import hashlib
+import hmac
+import ipaddress
 import logging
+import threading
 import time
-from collections import defaultdict
-from importlib import metadata
+from contextlib import closing
 
-from fastapi import FastAPI, HTTPException, Request, status
+import orjson
+from cachetools import TTLCache
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer
+from starlette.routing import Route
 
 from .adapters import normalize_event
 from .analyzer import enrich_and_score
 from .api import api_router
-from .autotask import create_autotask_ticket
 from .config import SETTINGS
-from .database import create_tables, get_db, save_alert
+from .database import SessionLocal, create_tables, save_alert
+from .intel import intel_client
 from .logging import setup_json_logging
 from .models import EventIn
-from .notifiers import send_email
 from .security import WebhookAuth
 
-try:
-    VERSION = metadata.version("soc_agent")
-except metadata.PackageNotFoundError:  # pragma: no cover - fallback for non-installed package
-    VERSION = "0.0.0"
+try:  # Optional shared rate-limit backend; falls back to in-process buckets
+    import redis
+except ImportError:  # pragma: no cover - depends on deployment
+    redis = None
+
+# Version is baked into _version.py (the build reads it from there too), so
+# import avoids the importlib.metadata filesystem scan on every cold start.
+from ._version import __version__ as VERSION
 
 logger = logging.getLogger(__name__)
 
-# Rate limiting storage (in production, use Redis)
-rate_limit_storage: defaultdict[str, list] = defaultdict(list)
+# Hot config values bound once at import so the per-request path skips the
+# Pydantic attribute descriptors; call refresh_config() after mutating
+# SETTINGS to rebind them. The HMAC key is encoded here too, once.
+_MAX_REQUEST_SIZE = SETTINGS.max_request_size
+_SHARED_SECRET = SETTINGS.webhook_shared_secret
+_HMAC_KEY = (
+    SETTINGS.webhook_hmac_secret.encode("utf-8") if SETTINGS.webhook_hmac_secret else None
+)
+_HMAC_HEADER = SETTINGS.webhook_hmac_header
+_HMAC_PREFIX = SETTINGS.webhook_hmac_prefix
+_RATE_LIMIT_REQUESTS = float(SETTINGS.rate_limit_requests)
+_RATE_LIMIT_WINDOW = SETTINGS.rate_limit_window
+_TRUSTED_PROXIES = [ipaddress.ip_network(cidr) for cidr in SETTINGS.trusted_proxies]
+
+
+def refresh_config() -> None:
+    """Rebind module-level config constants after SETTINGS changes."""
+    global _MAX_REQUEST_SIZE, _SHARED_SECRET, _HMAC_KEY, _HMAC_HEADER
+    global _HMAC_PREFIX, _RATE_LIMIT_REQUESTS, _RATE_LIMIT_WINDOW, _TRUSTED_PROXIES
+    _MAX_REQUEST_SIZE = SETTINGS.max_request_size
+    _SHARED_SECRET = SETTINGS.webhook_shared_secret
+    _HMAC_KEY = (
+        SETTINGS.webhook_hmac_secret.encode("utf-8") if SETTINGS.webhook_hmac_secret else None
+    )
+    _HMAC_HEADER = SETTINGS.webhook_hmac_header
+    _HMAC_PREFIX = SETTINGS.webhook_hmac_prefix
+    _RATE_LIMIT_REQUESTS = float(SETTINGS.rate_limit_requests)
+    _RATE_LIMIT_WINDOW = SETTINGS.rate_limit_window
+    _TRUSTED_PROXIES = [ipaddress.ip_network(cidr) for cidr in SETTINGS.trusted_proxies]
+
+
+def _client_ip(req: Request) -> str:
+    """Resolve the real client address for rate limiting.
+
+    Behind an internal ingress every request arrives from the proxy's pod
+    IP, so all clients would share one rate-limit bucket. When the peer is
+    inside a configured trusted-proxy CIDR, honor the first hop of
+    X-Forwarded-For instead; untrusted peers never get to spoof it.
+    """
+    host = req.client.host if req.client else "unknown"
+    if _TRUSTED_PROXIES:
+        try:
+            addr = ipaddress.ip_address(host)
+        except ValueError:
+            return host
+        if any(addr in net for net in _TRUSTED_PROXIES):
+            forwarded = req.headers.get("x-forwarded-for", "")
+            return forwarded.split(",")[0].strip() or host
+    return host
+
+
+# Token-bucket rate limiting state: (tokens, last_refill) per client. O(1)
+# per request and constant memory per client. The TTLCache bounds total
+# memory across distinct client IPs (a spoofed-source flood would otherwise
+# grow the dict without limit) and ages out idle entries; evicted clients
+# simply restart with a full bucket. Writes share _rate_limit_lock since
+# TTLCache is not thread-safe. (In production, use Redis.)
+rate_limit_storage: TTLCache = TTLCache(
+    maxsize=SETTINGS.rate_limit_max_clients, ttl=SETTINGS.rate_limit_window * 10
+)
+_rate_limit_lock = threading.Lock()
+_requests_admitted = 0  # served requests, reported by /metrics
+
+# Shared rate-limit state when Redis is configured: every worker sees the
+# same counters, and the whole update runs server-side as one atomic Lua
+# EVAL. Two adjacent window counters (keyed by window index, TTL twice the
+# window) give a weighted sliding-window estimate, avoiding the burst at
+# fixed-window edges while staying O(1) per check.
+_RATE_LIMIT_LUA = """
+local cur = redis.call('INCR', KEYS[1])
+if cur == 1 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[1])
+end
+local prev = tonumber(redis.call('GET', KEYS[2]) or '0')
+return {cur, prev}
+"""
+_rate_limit_script = None
+if redis is not None and SETTINGS.redis_url:
+    try:
+        # Short socket timeouts so an unreachable Redis fails fast into the
+        # local bucket instead of stalling every request on the TCP timeout
+        _rate_limit_script = redis.Redis.from_url(
+            SETTINGS.redis_url,
+            socket_connect_timeout=0.5,
+            socket_timeout=0.5,
+        ).register_script(_RATE_LIMIT_LUA)
+    except Exception as e:
+        logger.warning("Redis rate limiting unavailable, using in-process buckets: %s", e)
 
 app = FastAPI(
     title="SOC Agent – Webhook Analyzer", 
@@ -38,6 +133,7 @@ app = FastAPI(
     description="Security Operations Center webhook analyzer with threat intelligence enrichment",
     docs_url="/docs" if SETTINGS.log_level == "DEBUG" else None,
     redoc_url="/redoc" if SETTINGS.log_level == "DEBUG" else None,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -58,27 +154,81 @@ setup_json_logging()
 # Create database tables
 create_tables()
 
+# Liveness probe as a raw Starlette route: k8s hits this every second, and
+# registering it ahead of the FastAPI routes skips the dependency/validation
+# machinery a normal endpoint pays per call.
+async def _healthz(request):
+    return ORJSONResponse({"status": "ok", "timestamp": time.time()})
+
+
+app.router.routes.insert(0, Route("/healthz", _healthz))
+
 # Include API router
 app.include_router(api_router)
 
 
+# Notifier imports are deferred to first use: the Autotask client and
+# smtplib/email stack are only needed when an action actually fires, so
+# cold starts (workers, test collection) skip loading them. Each stub
+# replaces itself with the real function on first call.
+def create_autotask_ticket(*args, **kwargs):
+    global create_autotask_ticket
+    from .autotask import create_autotask_ticket as _impl
+    create_autotask_ticket = _impl
+    return _impl(*args, **kwargs)
+
+
+def send_email(*args, **kwargs):
+    global send_email
+    from .notifiers import send_email as _impl
+    send_email = _impl
+    return _impl(*args, **kwargs)
+
+
 def check_rate_limit(client_ip: str) -> bool:
-    """Check if client has exceeded rate limit."""
-    current_time = time.time()
-    window_start = current_time - SETTINGS.rate_limit_window
-    
-    # Clean old entries
-    rate_limit_storage[client_ip] = [
-        timestamp for timestamp in rate_limit_storage[client_ip] 
-        if timestamp > window_start
-    ]
-    
-    # Check if under limit
-    if len(rate_limit_storage[client_ip]) >= SETTINGS.rate_limit_requests:
-        return False
-    
-    # Add current request
-    rate_limit_storage[client_ip].append(current_time)
+    """Check if client has exceeded rate limit.
+
+    With Redis configured the count lives there, atomic and shared across
+    workers; otherwise (or when Redis errors) each client is a local token
+    bucket refilled at rate_limit_requests/rate_limit_window tokens per
+    second, where a request costs one token.
+    """
+    global _requests_admitted
+    now = time.time()
+
+    if _rate_limit_script is not None:
+        window = _RATE_LIMIT_WINDOW
+        window_idx = int(now // window)
+        try:
+            cur, prev = _rate_limit_script(
+                keys=[
+                    f"rl:{client_ip}:{window_idx}",
+                    f"rl:{client_ip}:{window_idx - 1}",
+                ],
+                args=[2 * window * 1000],
+            )
+        except Exception as e:
+            logger.warning("Redis rate-limit check failed, using local bucket: %s", e)
+        else:
+            # Weight the previous window by how much of it still overlaps a
+            # window-sized span ending now (Cloudflare's sliding estimate)
+            prev_weight = 1.0 - (now % window) / window
+            if prev * prev_weight + cur > _RATE_LIMIT_REQUESTS:
+                return False
+            with _rate_limit_lock:
+                _requests_admitted += 1
+            return True
+    capacity = _RATE_LIMIT_REQUESTS
+    refill_rate = capacity / _RATE_LIMIT_WINDOW
+
+    with _rate_limit_lock:
+        tokens, last_refill = rate_limit_storage.get(client_ip, (capacity, now))
+        tokens = min(capacity, tokens + (now - last_refill) * refill_rate)
+        if tokens < 1.0:
+            rate_limit_storage[client_ip] = (tokens, now)
+            return False
+        rate_limit_storage[client_ip] = (tokens - 1.0, now)
+        _requests_admitted += 1
     return True
 
 
@@ -93,12 +243,6 @@ def root():
     }
 
 
-@app.get("/healthz")
-def healthz():
-    """Health check endpoint."""
-    return {"status": "ok", "timestamp": time.time()}
-
-
 @app.get("/readyz")
 def readyz():
     """Readiness check endpoint."""
@@ -111,7 +255,7 @@ def readyz():
     all_ready = all(checks.values())
     status_code = status.HTTP_200_OK if all_ready else status.HTTP_503_SERVICE_UNAVAILABLE
     
-    return JSONResponse(
+    return ORJSONResponse(
         content={"status": "ready" if all_ready else "not ready", "checks": checks},
         status_code=status_code
     )
@@ -124,151 +268,189 @@ def metrics():
         raise HTTPException(status_code=404, detail="Metrics disabled")
     
     return {
-        "requests_total": sum(len(requests) for requests in rate_limit_storage.values()),
+        "requests_total": _requests_admitted,
         "active_clients": len(rate_limit_storage),
-        "cache_size": len(getattr(intel_client, '_cache', {})),
+        "cache_size": intel_client.cache_size,
     }
 
 
+def _persist_alert(event_dict: dict, result: dict, actions: dict) -> None:
+    """Write the alert in one short-lived session; save_alert maps the
+    actions dict onto the email_sent/ticket_created/ticket_id columns."""
+    try:
+        with closing(SessionLocal()) as db:
+            alert = save_alert(db, event_dict, result, actions)
+            logger.info("Alert saved to database with ID: %s", alert.id)
+    except Exception as e:
+        logger.error("Failed to save alert to database: %s", e)
+
+
 @app.post("/webhook")
-async def webhook(req: Request):
+async def webhook(req: Request, background_tasks: BackgroundTasks):
     """Main webhook endpoint for processing security events."""
-    # Get client IP for rate limiting
-    client_ip = req.client.host if req.client else "unknown"
-    
+    # Get client IP for rate limiting (proxy-aware)
+    client_ip = _client_ip(req)
+
     # Check rate limit
     if not check_rate_limit(client_ip):
-        logger.warning(f"Rate limit exceeded for client: {client_ip}")
+        logger.warning("Rate limit exceeded for client: %s", client_ip)
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Rate limit exceeded"
         )
     
-    # Check request size
+    # Check request size (fast-fail on the declared length first). The
+    # header is advisory only — the real limit is enforced on bytes
+    # received in the streaming loop below — so a malformed value is
+    # simply ignored rather than rejected.
     content_length = req.headers.get("content-length")
-    if content_length and int(content_length) > SETTINGS.max_request_size:
-        logger.warning(f"Request too large from {client_ip}: {content_length} bytes")
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail="Request too large"
-        )
-    
+    if content_length:
+        try:
+            declared = int(content_length)
+        except ValueError:
+            declared = 0
+        if declared > _MAX_REQUEST_SIZE:
+            logger.warning("Request too large from %s: %s bytes", client_ip, content_length)
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Request too large"
+            )
+
+    # Read the body from the ASGI stream chunk-by-chunk with a running byte
+    # counter: Content-Length is advisory (absent or spoofable), so the limit
+    # is enforced on bytes actually received and oversized requests abort
+    # without buffering the rest.
+    # The HMAC is fed chunk-by-chunk as the body arrives, so verification
+    # below compares against an already-finished digest instead of
+    # re-hashing the buffered payload.
+    mac = hmac.new(_HMAC_KEY, None, hashlib.sha256) if _HMAC_KEY else None
+    buf = bytearray()
     try:
-        body = await req.body()
+        async for chunk in req.stream():
+            buf.extend(chunk)
+            if mac is not None:
+                mac.update(chunk)
+            if len(buf) > _MAX_REQUEST_SIZE:
+                logger.warning("Request body exceeded limit from %s", client_ip)
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="Request too large"
+                )
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Failed to read request body from {client_ip}: {e}")
+        logger.error("Failed to read request body from %s: %s", client_ip, e)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Failed to read request body")
+    body = bytes(buf)
 
     # Optional shared-secret or HMAC verification
-    if SETTINGS.webhook_shared_secret:
+    if _SHARED_SECRET:
         provided = req.headers.get("X-Webhook-Secret")
-        if not WebhookAuth.verify_shared_secret(provided, SETTINGS.webhook_shared_secret):
-            logger.warning(f"Invalid webhook secret from {client_ip}")
+        if not WebhookAuth.verify_shared_secret(provided, _SHARED_SECRET):
+            logger.warning("Invalid webhook secret from %s", client_ip)
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook secret")
     
-    if SETTINGS.webhook_hmac_secret:
-        signature = req.headers.get(SETTINGS.webhook_hmac_header)
-        if not WebhookAuth.verify_hmac(
-            body, signature, SETTINGS.webhook_hmac_secret, SETTINGS.webhook_hmac_prefix
-        ):
-            logger.warning(f"Invalid HMAC signature from {client_ip}")
+    if mac is not None:
+        signature = req.headers.get(_HMAC_HEADER)
+        if not WebhookAuth.verify_hmac_digest(mac.digest(), signature, _HMAC_PREFIX):
+            logger.warning("Invalid HMAC signature from %s", client_ip)
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid HMAC signature")
 
     try:
-        event = json.loads(body.decode("utf-8"))
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON from {client_ip}: {e}")
+        # orjson decodes straight from bytes in C; no intermediate str
+        event = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        logger.error("Invalid JSON from %s: %s", client_ip, e)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON")
     except Exception as e:
-        logger.error(f"Unexpected error parsing JSON from {client_ip}: {e}")
+        logger.error("Unexpected error parsing JSON from %s: %s", client_ip, e)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid request format")
 
     try:
         # Normalize vendor payloads first
         normalized = normalize_event(event)
-        logger.debug(f"Normalized event from {client_ip}: {normalized.get('source', 'unknown')}")
+        logger.debug("Normalized event from %s: %s", client_ip, normalized.get('source', 'unknown'))
 
         # Validate normalized payload
         payload = EventIn.model_validate(normalized)
-        logger.info(f"Processing event from {client_ip}: {payload.event_type} (severity: {payload.severity})")
+        logger.info("Processing event from %s: %s (severity: %s)", client_ip, payload.event_type, payload.severity)
 
     except Exception as e:
-        logger.error(f"Invalid payload from {client_ip}: {e}")
+        logger.error("Invalid payload from %s: %s", client_ip, e)
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Invalid payload: {e}")
 
+    # Dump once; model_dump rebuilds the dict recursively on every call
+    event_dict = payload.model_dump()
+
     try:
-        # Analyze and score the event
-        result = enrich_and_score(payload.model_dump())
-        logger.info(f"Analysis complete for {client_ip}: category={result['category']}, action={result['recommended_action']}")
+        # Analyze and score the event off the event loop: enrichment is
+        # blocking HTTPS against the intel providers (fanned out across a
+        # thread pool inside enrich_ips, deduped per payload), and running
+        # it inline would stall every other request on this worker.
+        result = await asyncio.to_thread(enrich_and_score, event_dict)
+        logger.info("Analysis complete for %s: category=%s, action=%s", client_ip, result['category'], result['recommended_action'])
 
     except Exception as e:
-        logger.error(f"Analysis failed for {client_ip}: {e}")
+        logger.error("Analysis failed for %s: %s", client_ip, e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Analysis failed")
 
-    # Save alert to database
-    try:
-        db = next(get_db())
-        alert = save_alert(db, payload.model_dump(), result, {})
-        logger.info(f"Alert saved to database with ID: {alert.id}")
-    except Exception as e:
-        logger.error(f"Failed to save alert to database: {e}")
-        # Continue processing even if database save fails
-
-    # Generate notification content
-    title = f"[{result['category']}] {payload.event_type or 'event'} – {payload.source or 'unknown'}"
-    summary_lines = [
-        f"Source: {payload.source}",
-        f"Type: {payload.event_type}  Severity: {payload.severity}",
-        f"Timestamp: {payload.timestamp}",
-        f"Message: {payload.message}",
-        f"IOCs: {json.dumps(result['iocs'])}",
-        (
+    # Execute recommended actions off the event loop: both notifiers are
+    # blocking network calls (HTTPS/SMTP) that would otherwise stall every
+    # other request on this worker while they run. Notification content is
+    # only built when an action will actually fire — the LOW-severity
+    # majority path skips the formatting work entirely.
+    actions = {}
+    if result["recommended_action"] in ("ticket", "email"):
+        title = f"[{result['category']}] {payload.event_type or 'event'} – {payload.source or 'unknown'}"
+        iocs_json = orjson.dumps(result["iocs"]).decode()
+        body_out = (
+            f"Source: {payload.source}\n"
+            f"Type: {payload.event_type}  Severity: {payload.severity}\n"
+            f"Timestamp: {payload.timestamp}\n"
+            f"Message: {payload.message}\n"
+            f"IOCs: {iocs_json}\n"
             f"Scores: base={result['scores']['base']} "
             f"intel={result['scores']['intel']} "
-            f"final={result['scores']['final']}"
-        ),
-        f"Recommended action: {result['recommended_action']}",
-    ]
-    
-    # Add intelligence details
-    for ipinfo in result.get("intel", {}).get("ips", []):
-        label = ",".join(ipinfo.get("labels", []))
-        scr = ipinfo.get("score", 0)
-        summary_lines.append(f"Intel: {ipinfo['indicator']} -> {label} (score {scr})")
-    
-    body_out = "\n".join(summary_lines)
+            f"final={result['scores']['final']}\n"
+            f"Recommended action: {result['recommended_action']}"
+        )
+        intel_lines = "\n".join(
+            # skip the join for label-less records (the common case)
+            f"Intel: {ipinfo['indicator']} -> {','.join(labels) if (labels := ipinfo.get('labels')) else ''} (score {ipinfo.get('score', 0)})"
+            for ipinfo in result.get("intel", {}).get("ips", [])
+        )
+        if intel_lines:
+            body_out = f"{body_out}\n{intel_lines}"
 
-    # Execute recommended actions
-    actions = {}
     try:
         if result["recommended_action"] == "ticket":
-            ok, msg, resp = create_autotask_ticket(title=title, description=body_out)
+            ok, msg, resp = await asyncio.to_thread(
+                create_autotask_ticket, title=title, description=body_out
+            )
             actions["autotask_ticket"] = {"ok": ok, "message": msg, "response": resp}
-            logger.info(f"Autotask ticket creation: {ok} - {msg}")
-            
+            logger.info("Autotask ticket creation: %s - %s", ok, msg)
+
         elif result["recommended_action"] == "email":
-            ok, msg = send_email(subject=title, body=body_out)
+            ok, msg = await asyncio.to_thread(send_email, subject=title, body=body_out)
             actions["email"] = {"ok": ok, "message": msg}
-            logger.info(f"Email notification: {ok} - {msg}")
+            logger.info("Email notification: %s - %s", ok, msg)
             
     except Exception as e:
-        logger.error(f"Action execution failed for {client_ip}: {e}")
+        logger.error("Action execution failed for %s: %s", client_ip, e)
         actions["error"] = {"message": str(e)}
 
-    # Update alert with action results
-    try:
-        if 'alert' in locals():
-            alert.email_sent = actions.get("email", {}).get("ok", False)
-            alert.ticket_created = actions.get("autotask_ticket", {}).get("ok", False)
-            if actions.get("autotask_ticket", {}).get("ok") and actions.get("autotask_ticket", {}).get("response"):
-                alert.ticket_id = actions["autotask_ticket"]["response"].get("id")
-            db.commit()
-            logger.info(f"Alert {alert.id} updated with action results")
-    except Exception as e:
-        logger.error(f"Failed to update alert with action results: {e}")
-
-    return JSONResponse({
-        "analysis": result, 
+    # Persist the alert in one transaction. The no-action majority gets its
+    # write deferred to after the response is sent — the caller doesn't need
+    # the row, so the request isn't held open for the insert. Alerts that
+    # fired a notification are saved inline so the action outcome is durable
+    # before we acknowledge.
+    if result["recommended_action"] == "none":
+        background_tasks.add_task(_persist_alert, event_dict, result, actions)
+    else:
+        _persist_alert(event_dict, result, actions)
+
+    return ORJSONResponse({
+        "analysis": result,
         "actions": actions,
         "processed_at": time.time()
     })
@@ -11,6 +11,11 @@ def disable_side_effects(monkeypatch):
     yield
 
 
-@pytest.fixture
+# Session scope: TestClient spins up an ASGI lifespan per construction, so
+# one shared instance saves that cost on every test. Note the app does keep
+# module-level state across tests — most visibly the rate_limit_storage
+# buckets, which make 429s from one test bleed into later ones regardless
+# of client scope.
+@pytest.fixture(scope="session")
 def client():
     return TestClient(app)
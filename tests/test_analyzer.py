@@ -10,6 +10,9 @@ class DummyIntel:
             "sources": {},
         }
 
+    def enrich_ips(self, ips):
+        return [self.enrich_ip(ip) for ip in ips]
+
 
 def test_extract_and_score(monkeypatch):
     monkeypatch.setattr("soc_agent.analyzer.intel_client", DummyIntel())
@@ -3,14 +3,6 @@
 import json
 import pytest
 from unittest.mock import patch, MagicMock
-from fastapi.testclient import TestClient
-
-from soc_agent.webapp import app
-
-
-@pytest.fixture
-def client():
-    return TestClient(app)
 
 
 @pytest.fixture
@@ -24,6 +16,11 @@ def mock_intel_client():
             "sources": {"otx": {"pulse_info": {"pulses": [1]}}},
             "enriched_at": 1234567890
         }
+        # enrich_and_score goes through the batch API; mirror the
+        # single-IP result for every requested IP
+        mock.enrich_ips.side_effect = lambda ips: [
+            mock.enrich_ip.return_value for _ in ips
+        ]
         yield mock
 
 
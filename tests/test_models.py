@@ -42,7 +42,7 @@ def test_invalid_username():
     with pytest.raises(ValidationError) as exc_info:
         EventIn(username="user<script>", event_type="test", severity=1)
     
-    assert "Username contains invalid characters" in str(exc_info.value)
+    assert "string_pattern_mismatch" in str(exc_info.value)
 
 
 def test_malicious_message():
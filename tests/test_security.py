@@ -1,16 +1,5 @@
 """Security tests for SOC Agent."""
 
-import pytest
-from fastapi.testclient import TestClient
-
-from soc_agent.webapp import app
-
-
-@pytest.fixture
-def client():
-    return TestClient(app)
-
-
 def test_rate_limiting(client):
     """Test rate limiting functionality."""
     # Send requests up to the limit
@@ -1,10 +1,4 @@
-from fastapi.testclient import TestClient
-
-from soc_agent.webapp import app
-
-client = TestClient(app)
-
-def test_webhook_ok(monkeypatch):
+def test_webhook_ok(client, monkeypatch):
     monkeypatch.setattr(
         "soc_agent.webapp.create_autotask_ticket",
         lambda **kw: (True, "created", {"id": 1}),